@@ -15,25 +15,36 @@ Features:
 """
 
 import sys
-import json
 import time
 import logging
-from datetime import datetime
-from typing import Optional
 
 import paho.mqtt.client as mqtt
 from PyQt5.QtWidgets import (
-    QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QGridLayout,
-    QWidget, QLabel, QPushButton, QLineEdit, QGroupBox, QFrame
+    QApplication, QMainWindow, QVBoxLayout, QHBoxLayout,
+    QWidget, QLabel, QPushButton, QLineEdit, QGroupBox
 )
-from PyQt5.QtCore import QTimer, Qt, pyqtSignal, QObject
-from PyQt5.QtGui import QFont, QPalette, QIcon
+from PyQt5.QtCore import (
+    QTimer, Qt, pyqtSignal, pyqtSlot, QObject, QThread, QMetaObject, Q_ARG,
+    QSocketNotifier
+)
+from PyQt5.QtGui import QFont
 
 # Configuration
 MQTT_BROKER = "broker.hivemq.com"
 MQTT_PORT = 1883
 DEFAULT_BUTTON_TOPIC = "server_room/control/button"
 DEFAULT_RELAY_TOPIC = "server_room/control/relay"
+BUTTON_MESSAGE = b"1"  # any message on the button topic counts as a press
+MQTT_MISC_INTERVAL_MS = 1000  # keepalive / reconnect housekeeping
+MQTT_RECONNECT_DELAY_MIN = 1  # seconds before the first reconnect attempt
+MQTT_RECONNECT_DELAY_MAX = 30  # backoff ceiling between reconnect attempts
+BUTTON_DEBOUNCE_MS = 150  # window for coalescing rapid button presses
+PRESS_COUNT_TEXT = tuple(str(i) for i in range(256))  # pre-formatted press counter values
+
+# Relay status values
+FAN_ON = "ON"
+FAN_OFF = "OFF"
+_ON_PAYLOADS = frozenset((b"ON", b"on"))
 
 # Setup logging
 logging.basicConfig(
@@ -42,6 +53,148 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Shared fonts
+FONT_TITLE = QFont("Arial", 14, QFont.Bold)
+FONT_CONNECTION = QFont("Arial", 12, QFont.Bold)
+FONT_BUTTON = QFont("Arial", 13, QFont.Bold)
+FONT_STATUS = QFont("Arial", 11, QFont.Bold)
+
+# Stylesheets
+MAINWINDOW_STYLE = """
+    QMainWindow {
+        background-color: #ecf0f1;
+    }
+    QGroupBox {
+        font-weight: bold;
+        border: 2px solid #bdc3c7;
+        border-radius: 8px;
+        margin: 5px;
+        padding-top: 20px;
+        background-color: white;
+        min-height: 60px;
+    }
+    QGroupBox::title {
+        subcontrol-origin: margin;
+        left: 15px;
+        padding: 0 8px 0 8px;
+        color: #2c3e50;
+        font-size: 12px;
+        font-weight: bold;
+        background-color: white;
+    }
+    QLabel {
+        color: #2c3e50;
+        font-size: 11px;
+    }
+    QLabel[state="on"] {
+        color: #28a745;
+    }
+    QLabel[state="off"] {
+        color: #e74c3c;
+    }
+    QLineEdit {
+        padding: 8px;
+        border: 1px solid #bdc3c7;
+        border-radius: 4px;
+        font-size: 11px;
+        background-color: #ffffff;
+    }
+"""
+
+LINEEDIT_STYLE = """
+    QLineEdit {
+        padding: 6px 8px;
+        border: 1px solid #bdc3c7;
+        border-radius: 4px;
+        font-size: 11px;
+        background-color: #ffffff;
+        font-family: 'Courier New', monospace;
+        color: #2c3e50;
+    }
+    QLineEdit:focus {
+        border: 2px solid #3498db;
+    }
+    QLineEdit::placeholder {
+        color: #7f8c8d;
+        font-style: italic;
+    }
+"""
+
+UPDATE_BTN_STYLE = """
+    QPushButton {
+        background-color: #6c757d;
+        color: white;
+        border: none;
+        padding: 4px 8px;
+        border-radius: 4px;
+        font-weight: bold;
+        font-size: 10px;
+    }
+    QPushButton:hover {
+        background-color: #545b62;
+    }
+    QPushButton:pressed {
+        background-color: #495057;
+    }
+"""
+
+# Toggle button styles (fan ON shows red "turn off", fan OFF shows green "turn on")
+TOGGLE_ON_STYLE = """
+    QPushButton {
+        background-color: #dc3545;
+        color: white;
+        border: none;
+        border-radius: 8px;
+        font-weight: bold;
+        font-size: 11px;
+    }
+    QPushButton:hover {
+        background-color: #c82333;
+    }
+    QPushButton:pressed {
+        background-color: #bd2130;
+    }
+    QPushButton:disabled {
+        background-color: #95a5a6;
+        color: #7f8c8d;
+    }
+"""
+
+TOGGLE_OFF_STYLE = """
+    QPushButton {
+        background-color: #28a745;
+        color: white;
+        border: none;
+        border-radius: 8px;
+        font-weight: bold;
+        font-size: 11px;
+    }
+    QPushButton:hover {
+        background-color: #218838;
+    }
+    QPushButton:pressed {
+        background-color: #1e7e34;
+    }
+    QPushButton:disabled {
+        background-color: #95a5a6;
+        color: #7f8c8d;
+    }
+"""
+
+# Label text and "state" property for each state; colors come from MAINWINDOW_STYLE
+CONNECTION_DISPLAY = {
+    True: ("🟢 Connected", "on"),
+    False: ("🔴 Disconnected", "off"),
+}
+FAN_STATUS_DISPLAY = {
+    FAN_ON: ("🟢 ON", "on"),
+    FAN_OFF: ("🔴 OFF", "off"),
+}
+TOGGLE_DISPLAY = {
+    FAN_ON: ("🔴 TURN OFF FAN", TOGGLE_ON_STYLE),
+    FAN_OFF: ("🟢 TURN ON FAN", TOGGLE_OFF_STYLE),
+}
+
 
 class MQTTWorker(QObject):
     """Worker class to handle MQTT operations in a separate thread."""
@@ -49,7 +202,7 @@ class MQTTWorker(QObject):
     # Signals for communication with main thread
     connection_changed = pyqtSignal(bool)
     relay_status_changed = pyqtSignal(str)
-    message_published = pyqtSignal(str)
+    message_published = pyqtSignal(str, int)
     
     def __init__(self):
         super().__init__()
@@ -58,6 +211,17 @@ class MQTTWorker(QObject):
         self.button_topic = DEFAULT_BUTTON_TOPIC
         self.relay_topic = DEFAULT_RELAY_TOPIC
         
+        # Qt event loop integration (replaces paho's loop_start thread)
+        self._read_notifier = None
+        self._write_notifier = None
+        self._misc_timer = None
+        self._stopping = False
+        
+        # Reconnect backoff, doubled after each failed attempt like paho's own loop
+        self._reconnect_delay = MQTT_RECONNECT_DELAY_MIN
+        self._next_reconnect = 0.0  # time.monotonic() of the next allowed attempt
+        
+    @pyqtSlot()
     def setup_mqtt(self):
         """Initialize MQTT client."""
         try:
@@ -65,19 +229,83 @@ class MQTTWorker(QObject):
             self.client.on_connect = self._on_connect
             self.client.on_disconnect = self._on_disconnect
             self.client.on_message = self._on_message
+            self.client.on_socket_open = self._on_socket_open
+            self.client.on_socket_close = self._on_socket_close
+            
+            # Keepalives and reconnects are driven from the worker thread's event loop
+            self._misc_timer = QTimer(self)
+            self._misc_timer.setTimerType(Qt.VeryCoarseTimer)
+            self._misc_timer.timeout.connect(self._loop_misc)
+            self._misc_timer.start(MQTT_MISC_INTERVAL_MS)
             
             logger.info(f"Connecting to MQTT broker at {MQTT_BROKER}:{MQTT_PORT}")
             self.client.connect(MQTT_BROKER, MQTT_PORT)
-            self.client.loop_start()
+            self._update_write_notifier()
             
         except Exception as e:
             logger.error(f"Failed to setup MQTT: {e}")
             self.connection_changed.emit(False)
     
+    def _on_socket_open(self, client, userdata, sock):
+        """Callback for when paho opens a socket; watch it with Qt notifiers."""
+        self._remove_notifiers()
+        fd = sock.fileno()
+        
+        self._read_notifier = QSocketNotifier(fd, QSocketNotifier.Read, self)
+        self._read_notifier.activated.connect(self._loop_read)
+        
+        self._write_notifier = QSocketNotifier(fd, QSocketNotifier.Write, self)
+        self._write_notifier.activated.connect(self._loop_write)
+        self._write_notifier.setEnabled(False)
+    
+    def _on_socket_close(self, client, userdata, sock):
+        """Callback for when paho closes its socket."""
+        self._remove_notifiers()
+    
+    def _remove_notifiers(self):
+        """Disable and discard the socket notifiers."""
+        for notifier in (self._read_notifier, self._write_notifier):
+            if notifier is not None:
+                notifier.setEnabled(False)
+                notifier.deleteLater()
+        self._read_notifier = None
+        self._write_notifier = None
+    
+    def _update_write_notifier(self):
+        """Only watch for writability while paho has outgoing data queued."""
+        if self._write_notifier is not None:
+            self._write_notifier.setEnabled(self.client.want_write())
+    
+    def _loop_read(self):
+        """Read pending network data when the socket becomes readable."""
+        self.client.loop_read()
+        self._update_write_notifier()
+    
+    def _loop_write(self):
+        """Flush queued packets when the socket becomes writable."""
+        self.client.loop_write()
+        self._update_write_notifier()
+    
+    def _loop_misc(self):
+        """Handle keepalives and reconnect after an unexpected connection loss."""
+        if self.client.loop_misc() == mqtt.MQTT_ERR_NO_CONN and not self._stopping:
+            now = time.monotonic()
+            if now >= self._next_reconnect:
+                # reconnect() blocks for up to the connect timeout, so back off between
+                # attempts rather than retrying the broker every second during an outage
+                self._next_reconnect = now + self._reconnect_delay
+                self._reconnect_delay = min(self._reconnect_delay * 2, MQTT_RECONNECT_DELAY_MAX)
+                try:
+                    self.client.reconnect()
+                except Exception as e:
+                    logger.debug(f"Reconnect attempt failed: {e}")
+        self._update_write_notifier()
+    
     def _on_connect(self, client, userdata, flags, rc):
         """Callback for successful MQTT connection."""
         if rc == 0:
             self.connected = True
+            self._reconnect_delay = MQTT_RECONNECT_DELAY_MIN
             logger.info("Connected to MQTT broker")
             self.connection_changed.emit(True)
             
@@ -97,29 +325,35 @@ class MQTTWorker(QObject):
     def _on_message(self, client, userdata, msg):
         """Callback for received MQTT messages."""
         try:
-            topic = msg.topic
-            payload = msg.payload.decode('utf-8').strip().upper()
-            
-            if topic == self.relay_topic:
-                logger.info(f"Received relay status: {payload}")
-                self.relay_status_changed.emit(payload)
+            if msg.topic == self.relay_topic:
+                # Relay payloads are plain b"ON"/b"OFF"; compare bytes without decoding
+                status = FAN_ON if msg.payload in _ON_PAYLOADS else FAN_OFF
+                logger.info(f"Received relay status: {status}")
+                self.relay_status_changed.emit(status)
                 
         except Exception as e:
             logger.error(f"Error processing MQTT message: {e}")
     
-    def publish_button_press(self):
-        """Publish button press message."""
+    @pyqtSlot(int)
+    def publish_button_press(self, presses: int = 1):
+        """
+        Publish button press message.
+        
+        Args:
+            presses: Clicks this publish stands for, reported back on message_published
+        """
         if not self.connected or not self.client:
             logger.warning("Cannot publish - not connected to MQTT broker")
             return False
             
         try:
-            message = "pressed"
-            result = self.client.publish(self.button_topic, message, qos=1)
+            # QoS 0: no PUBACK round-trip; rc only reflects local queueing
+            result = self.client.publish(self.button_topic, BUTTON_MESSAGE, qos=0)
             
-            if result.rc == 0:
+            if result.rc == mqtt.MQTT_ERR_SUCCESS:
+                self._update_write_notifier()
                 logger.info(f"Published button press to {self.button_topic}")
-                self.message_published.emit(f"Button press sent to {self.button_topic}")
+                self.message_published.emit(f"Button press sent to {self.button_topic}", presses)
                 return True
             else:
                 logger.error(f"Failed to publish button press: {result.rc}")
@@ -129,8 +363,12 @@ class MQTTWorker(QObject):
             logger.error(f"Error publishing button press: {e}")
             return False
     
+    @pyqtSlot(str, str)
     def update_topics(self, button_topic: str, relay_topic: str):
         """Update MQTT topics and resubscribe."""
+        if button_topic == self.button_topic and relay_topic == self.relay_topic:
+            return
+        
         old_relay_topic = self.relay_topic
         self.button_topic = button_topic
         self.relay_topic = relay_topic
@@ -140,12 +378,16 @@ class MQTTWorker(QObject):
             if old_relay_topic != relay_topic:
                 self.client.unsubscribe(old_relay_topic)
                 self.client.subscribe(relay_topic, qos=1)
+                self._update_write_notifier()
                 logger.info(f"Updated relay subscription: {old_relay_topic} → {relay_topic}")
     
+    @pyqtSlot()
     def disconnect(self):
         """Disconnect from MQTT broker."""
+        self._stopping = True
+        if self._misc_timer:
+            self._misc_timer.stop()
         if self.client:
-            self.client.loop_stop()
             self.client.disconnect()
 
 
@@ -155,55 +397,32 @@ class ButtonControlPanel(QMainWindow):
     def __init__(self):
         super().__init__()
         self.mqtt_worker = MQTTWorker()
-        self.fan_status = "OFF"
+        self.fan_status = FAN_OFF
         self.connection_status = False
         self.button_presses = 0
+        self._last_applied_state = None
+        
+        # Rapid presses are coalesced into a single publish
+        self._pending_presses = 0
+        self._debounce_timer = QTimer(self)
+        self._debounce_timer.setSingleShot(True)
+        self._debounce_timer.setInterval(BUTTON_DEBOUNCE_MS)
+        self._debounce_timer.timeout.connect(self.flush_button_presses)
         
         self.init_ui()
         self.setup_mqtt_connections()
-        self.setup_timers()
         
-        # Start MQTT connection
-        self.mqtt_worker.setup_mqtt()
+        # Run the MQTT worker in its own thread so publishes never block the GUI
+        self.mqtt_thread = QThread(self)
+        self.mqtt_worker.moveToThread(self.mqtt_thread)
+        self.mqtt_thread.started.connect(self.mqtt_worker.setup_mqtt)
+        self.mqtt_thread.start()
     
     def init_ui(self):
         """Initialize the user interface."""
         self.setWindowTitle("🔘 Server Room Manual Control")
         self.setFixedSize(400, 450)
-        self.setStyleSheet("""
-            QMainWindow {
-                background-color: #ecf0f1;
-            }
-            QGroupBox {
-                font-weight: bold;
-                border: 2px solid #bdc3c7;
-                border-radius: 8px;
-                margin: 5px;
-                padding-top: 20px;
-                background-color: white;
-                min-height: 60px;
-            }
-            QGroupBox::title {
-                subcontrol-origin: margin;
-                left: 15px;
-                padding: 0 8px 0 8px;
-                color: #2c3e50;
-                font-size: 12px;
-                font-weight: bold;
-                background-color: white;
-            }
-            QLabel {
-                color: #2c3e50;
-                font-size: 11px;
-            }
-            QLineEdit {
-                padding: 8px;
-                border: 1px solid #bdc3c7;
-                border-radius: 4px;
-                font-size: 11px;
-                background-color: #ffffff;
-            }
-        """)
+        self.setStyleSheet(MAINWINDOW_STYLE)
         
         # Central widget
         central_widget = QWidget()
@@ -214,7 +433,7 @@ class ButtonControlPanel(QMainWindow):
         
         # Title
         title = QLabel("🔘 Manual Control")
-        title.setFont(QFont("Arial", 14, QFont.Bold))
+        title.setFont(FONT_TITLE)
         title.setAlignment(Qt.AlignCenter)
         title.setStyleSheet("color: #2c3e50; margin: 5px 0px 10px 0px; font-size: 14px;")
         layout.addWidget(title)
@@ -241,9 +460,10 @@ class ButtonControlPanel(QMainWindow):
         layout.setSpacing(5)
         
         self.connection_label = QLabel("🔴 Disconnected")
-        self.connection_label.setFont(QFont("Arial", 12, QFont.Bold))
+        self.connection_label.setFont(FONT_CONNECTION)
         self.connection_label.setAlignment(Qt.AlignCenter)
-        self.connection_label.setStyleSheet("color: #e74c3c; padding: 8px; font-size: 12px;")
+        self.connection_label.setStyleSheet("padding: 8px; font-size: 12px;")
+        self.set_label_state(self.connection_label, "off")
         
         layout.addWidget(self.connection_label)
         parent_layout.addWidget(group)
@@ -261,46 +481,13 @@ class ButtonControlPanel(QMainWindow):
         # Button topic input with placeholder
         self.button_topic_input = QLineEdit()
         self.button_topic_input.setPlaceholderText(DEFAULT_BUTTON_TOPIC)
-        self.button_topic_input.setStyleSheet("""
-            QLineEdit {
-                padding: 6px 8px;
-                border: 1px solid #bdc3c7;
-                border-radius: 4px;
-                font-size: 11px;
-                background-color: #ffffff;
-                font-family: 'Courier New', monospace;
-                color: #2c3e50;
-            }
-            QLineEdit:focus {
-                border: 2px solid #3498db;
-            }
-            QLineEdit::placeholder {
-                color: #7f8c8d;
-                font-style: italic;
-            }
-        """)
+        self.button_topic_input.setStyleSheet(LINEEDIT_STYLE)
         input_layout.addWidget(self.button_topic_input, 1)
         
         # Smaller update button
         update_btn = QPushButton("Update")
         update_btn.setFixedSize(60, 28)
-        update_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #6c757d;
-                color: white;
-                border: none;
-                padding: 4px 8px;
-                border-radius: 4px;
-                font-weight: bold;
-                font-size: 10px;
-            }
-            QPushButton:hover {
-                background-color: #545b62;
-            }
-            QPushButton:pressed {
-                background-color: #495057;
-            }
-        """)
+        update_btn.setStyleSheet(UPDATE_BTN_STYLE)
         update_btn.clicked.connect(self.update_topic)
         input_layout.addWidget(update_btn)
         
@@ -317,11 +504,11 @@ class ButtonControlPanel(QMainWindow):
         
         # Big toggle button
         self.toggle_button = QPushButton("🟢 TURN ON FAN")
-        self.toggle_button.setFont(QFont("Arial", 13, QFont.Bold))
+        self.toggle_button.setFont(FONT_BUTTON)
         self.toggle_button.setFixedSize(180, 50)
-        # Initial styling will be set in update_button_appearance method
         self.toggle_button.clicked.connect(self.toggle_fan)
         self.toggle_button.setEnabled(False)  # Disabled until connected
+        self.update_button_appearance()
         
         layout.addWidget(self.toggle_button, alignment=Qt.AlignCenter)
         parent_layout.addWidget(group)
@@ -341,8 +528,9 @@ class ButtonControlPanel(QMainWindow):
         fan_row.addWidget(fan_label)
         
         self.fan_status_label = QLabel("🔴 OFF")
-        self.fan_status_label.setFont(QFont("Arial", 11, QFont.Bold))
-        self.fan_status_label.setStyleSheet("color: #e74c3c; font-size: 11px;")
+        self.fan_status_label.setFont(FONT_STATUS)
+        self.fan_status_label.setStyleSheet("font-size: 11px;")
+        self.set_label_state(self.fan_status_label, "off")
         fan_row.addWidget(self.fan_status_label)
         fan_row.addStretch()
         layout.addLayout(fan_row)
@@ -354,8 +542,8 @@ class ButtonControlPanel(QMainWindow):
         press_label.setFixedWidth(60)
         press_row.addWidget(press_label)
         
-        self.button_count_label = QLabel("0")
-        self.button_count_label.setFont(QFont("Arial", 11, QFont.Bold))
+        self.button_count_label = QLabel(PRESS_COUNT_TEXT[0])
+        self.button_count_label.setFont(FONT_STATUS)
         self.button_count_label.setStyleSheet("color: #6c757d; font-size: 11px;")
         press_row.addWidget(self.button_count_label)
         press_row.addStretch()
@@ -369,54 +557,78 @@ class ButtonControlPanel(QMainWindow):
         self.mqtt_worker.relay_status_changed.connect(self.on_relay_status_changed)
         self.mqtt_worker.message_published.connect(self.on_message_published)
     
-    def setup_timers(self):
-        """Setup periodic timers."""
-        # Status update timer
-        self.status_timer = QTimer()
-        self.status_timer.timeout.connect(self.update_display)
-        self.status_timer.start(1000)  # Update every second
+    def set_label_state(self, label: QLabel, state: str):
+        """Switch a label's color via its "state" property instead of a new stylesheet."""
+        if label.property("state") == state:
+            return
+        label.setProperty("state", state)
+        label.style().unpolish(label)
+        label.style().polish(label)
     
     def on_connection_changed(self, connected: bool):
         """Handle MQTT connection status change."""
         self.connection_status = connected
         
+        # Window title mirrors the connection state
+        status_icon = "🟢" if connected else "🔴"
+        self.setWindowTitle(f"{status_icon} Server Room Manual Control")
+        
+        text, state = CONNECTION_DISPLAY[connected]
+        self.connection_label.setText(text)
+        self.set_label_state(self.connection_label, state)
+        self.toggle_button.setEnabled(connected)
         if connected:
-            self.connection_label.setText("🟢 Connected")
-            self.connection_label.setStyleSheet("color: #28a745;")
-            self.toggle_button.setEnabled(True)
             self.update_button_appearance()
-        else:
-            self.connection_label.setText("🔴 Disconnected")
-            self.connection_label.setStyleSheet("color: #e74c3c;")
-            self.toggle_button.setEnabled(False)
     
     def on_relay_status_changed(self, status: str):
         """Handle relay status change from MQTT."""
+        # Relay echoes often repeat the current state; skip the relabel then
+        if status == self.fan_status:
+            return
         self.fan_status = status
         
-        if status == "ON":
-            self.fan_status_label.setText("🟢 ON")
-            self.fan_status_label.setStyleSheet("color: #28a745;")
-        else:
-            self.fan_status_label.setText("🔴 OFF")
-            self.fan_status_label.setStyleSheet("color: #e74c3c;")
-            
+        text, state = FAN_STATUS_DISPLAY[status]
+        self.fan_status_label.setText(text)
+        self.set_label_state(self.fan_status_label, state)
+        
         # Update button appearance based on fan status
         self.update_button_appearance()
     
-    def on_message_published(self, message: str):
+    def on_message_published(self, message: str, presses: int):
         """Handle successful message publication."""
-        pass  # No longer displaying last action
+        self._count_presses(presses)
+    
+    def _count_presses(self, presses: int):
+        """Add clicks to the press counter."""
+        self.button_presses += presses
+        if self.button_presses < len(PRESS_COUNT_TEXT):
+            self.button_count_label.setText(PRESS_COUNT_TEXT[self.button_presses])
+        else:
+            self.button_count_label.setText(str(self.button_presses))
     
     def toggle_fan(self):
         """Handle toggle button press."""
         if not self.connection_status:
             return
-            
-        success = self.mqtt_worker.publish_button_press()
-        if success:
-            self.button_presses += 1
-            self.button_count_label.setText(str(self.button_presses))
+        
+        self._pending_presses += 1
+        self._debounce_timer.start()
+    
+    def flush_button_presses(self):
+        """Publish the presses collected during the debounce window."""
+        presses = self._pending_presses
+        self._pending_presses = 0
+        
+        # Every press toggles the fan, so an even burst cancels itself out; still count
+        # the clicks so they are not dropped without a trace
+        if presses % 2 == 0:
+            logger.info(f"{presses} button presses cancelled out, fan state unchanged - nothing sent")
+            self._count_presses(presses)
+            return
+        
+        # Queued to the MQTT thread; the press counter is updated on message_published
+        QMetaObject.invokeMethod(self.mqtt_worker, "publish_button_press", Qt.QueuedConnection,
+                                 Q_ARG(int, presses))
     
     def update_topic(self):
         """Update MQTT button topic."""
@@ -425,73 +637,35 @@ class ButtonControlPanel(QMainWindow):
         # Use default topic if input is empty
         if not button_topic:
             button_topic = DEFAULT_BUTTON_TOPIC
-            
-        self.mqtt_worker.update_topics(button_topic, DEFAULT_RELAY_TOPIC)
+        
+        # Nothing to do on the broker if the topic did not change
+        if button_topic != self.mqtt_worker.button_topic:
+            QMetaObject.invokeMethod(
+                self.mqtt_worker, "update_topics", Qt.QueuedConnection,
+                Q_ARG(str, button_topic), Q_ARG(str, DEFAULT_RELAY_TOPIC)
+            )
         # Clear the input to show placeholder again
         self.button_topic_input.clear()
     
     def update_button_appearance(self):
         """Update button appearance based on fan status."""
-        if self.fan_status == "ON":
-            # Fan is ON - show red button to turn OFF
-            self.toggle_button.setText("🔴 TURN OFF FAN")
-            self.toggle_button.setStyleSheet("""
-                QPushButton {
-                    background-color: #dc3545;
-                    color: white;
-                    border: none;
-                    border-radius: 8px;
-                    font-weight: bold;
-                    font-size: 11px;
-                }
-                QPushButton:hover {
-                    background-color: #c82333;
-                }
-                QPushButton:pressed {
-                    background-color: #bd2130;
-                }
-                QPushButton:disabled {
-                    background-color: #95a5a6;
-                    color: #7f8c8d;
-                }
-            """)
-        else:
-            # Fan is OFF - show green button to turn ON
-            self.toggle_button.setText("🟢 TURN ON FAN")
-            self.toggle_button.setStyleSheet("""
-                QPushButton {
-                    background-color: #28a745;
-                    color: white;
-                    border: none;
-                    border-radius: 8px;
-                    font-weight: bold;
-                    font-size: 11px;
-                }
-                QPushButton:hover {
-                    background-color: #218838;
-                }
-                QPushButton:pressed {
-                    background-color: #1e7e34;
-                }
-                QPushButton:disabled {
-                    background-color: #95a5a6;
-                    color: #7f8c8d;
-                }
-            """)
-    
-    def update_display(self):
-        """Update display elements periodically."""
-        # Update window title with connection status
-        status_icon = "🟢" if self.connection_status else "🔴"
-        self.setWindowTitle(f"{status_icon} Server Room Manual Control")
+        state = (self.fan_status, self.toggle_button.isEnabled())
+        if state == self._last_applied_state:
+            return
+        self._last_applied_state = state
         
-        # Ensure button appearance is correct
-        self.update_button_appearance()
+        # Fan ON shows a red "turn off" button, fan OFF a green "turn on" one
+        text, style = TOGGLE_DISPLAY[self.fan_status]
+        self.toggle_button.setText(text)
+        self.toggle_button.setStyleSheet(style)
     
     def closeEvent(self, event):
         """Handle window close event."""
         logger.info("Shutting down button control panel...")
-        self.mqtt_worker.disconnect()
+        # The notifiers live in the MQTT thread, so disconnect from there
+        QMetaObject.invokeMethod(self.mqtt_worker, "disconnect", Qt.BlockingQueuedConnection)
+        self.mqtt_thread.quit()
+        self.mqtt_thread.wait()
         event.accept()
 
 
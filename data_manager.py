@@ -16,13 +16,30 @@ Key Features:
 """
 
 import json
+import os
+import queue
+import re
 import sqlite3
+import sys
+import threading
 import time
 import logging
-from datetime import datetime, timezone
-from typing import Dict, Any, Optional, Tuple
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
 import paho.mqtt.client as mqtt
 
+# orjson is optional; it parses bytes directly and serializes straight to bytes
+try:
+    import orjson
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps
+except ImportError:
+    json_loads = json.loads
+
+    def json_dumps(obj) -> bytes:
+        """Serialize to compact UTF-8 JSON bytes, like orjson.dumps."""
+        return json.dumps(obj, separators=(",", ":")).encode()
+
 # Configuration
 MQTT_BROKER = "broker.hivemq.com"
 MQTT_PORT = 1883
@@ -31,6 +48,9 @@ MQTT_PORT = 1883
 MQTT_KEEPALIVE = 60
 MQTT_RECONNECT_DELAY_MIN = 1
 MQTT_RECONNECT_DELAY_MAX = 30
+MQTT_CONNECT_TIMEOUT = 10  # seconds to wait for CONNACK
+MESSAGE_QUEUE_SIZE = 1024  # received messages buffered for the worker thread
+ALARM_COALESCE_WINDOW = 0.05  # seconds - alarms raised within this window share one publish
 
 # MQTT Topics
 TOPIC_SENSOR_DHT = "server_room/sensor/dht"
@@ -44,11 +64,45 @@ TEMP_LOW_THRESHOLD = 26.0   # °C - Turn OFF relay
 HUMIDITY_HIGH_THRESHOLD = 70.0  # % - Turn ON relay
 HUMIDITY_LOW_THRESHOLD = 65.0   # % - Turn OFF relay
 
+# Hysteresis transitions: current relay state -> (next state, trigger predicate on temp/humidity)
+_TRANSITIONS = {
+    # Turn ON if temperature OR humidity exceeds high threshold
+    "OFF": ("ON", lambda t, h: t > TEMP_HIGH_THRESHOLD or h > HUMIDITY_HIGH_THRESHOLD),
+    # Turn OFF only if BOTH temperature AND humidity are below low thresholds
+    "ON": ("OFF", lambda t, h: t < TEMP_LOW_THRESHOLD and h < HUMIDITY_LOW_THRESHOLD),
+}
+
+# Per-message console output (set SRCM_VERBOSE=1 to enable); status changes always go to the log
+VERBOSE = os.environ.get("SRCM_VERBOSE", "").lower() in ("1", "true", "yes", "on")
+
 # Manual override configuration
 MANUAL_OVERRIDE_DURATION = 15  # seconds
 
 # Database configuration
 DATABASE_FILE = "server_room_monitor.db"
+DB_CACHED_STATEMENTS = 256
+SENSOR_FLUSH_SIZE = 50  # rows - flush buffered sensor readings at this size
+SENSOR_FLUSH_INTERVAL = 2.0  # seconds - or after this long, whichever comes first
+
+# Hot-path SQL, kept as single constant strings so sqlite3's statement cache always hits
+_SQL_INSERT_SENSOR = "INSERT INTO sensor_data (timestamp, temperature, humidity) VALUES (?, ?, ?)"
+_SQL_INSERT_ALARM = "INSERT INTO alarms (timestamp, message) VALUES (?, ?)"
+_SQL_SAVE_STATE = "INSERT OR REPLACE INTO system_state (key, value) VALUES (?, ?)"
+_SQL_LOAD_STATE = "SELECT value FROM system_state WHERE key = ?"
+
+# Alarm envelope; only the timestamp and the JSON-escaped message change between alarms
+_ALARM_TPL = b'{"timestamp":"%s","message":%s,"level":"warning"}'
+
+# Fast path for the emulator's fixed {"temp": .., "hum": ..} payload; anything else falls back to JSON
+_DHT_RE = re.compile(rb'"temp"\s*:\s*([-+\d.eE]+).*?"hum"\s*:\s*([-+\d.eE]+)', re.DOTALL)
+
+# Console layout
+_SEP60 = "=" * 60
+_SEP70 = "=" * 70
+_DASH60 = "-" * 60
+_DASH70 = "-" * 70
+_ICON = {"ON": "🟢", "OFF": "🔴"}
+_CONNECTION_DISPLAY = {True: "🟢 Connected", False: "🔴 Disconnected"}
 
 # Setup logging
 logging.basicConfig(
@@ -57,6 +111,29 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# (second, formatted prefix) of the last UTC timestamp built by utc_timestamp()
+_timestamp_cache: Tuple[int, str] = (-1, "")
+
+
+def utc_timestamp() -> str:
+    """
+    Build an ISO-8601 UTC timestamp for the current time.
+    
+    Produces the same format as datetime.now(timezone.utc).isoformat() but
+    reformats the date/time prefix only once per second.
+    
+    Returns:
+        Timestamp string, e.g. "2025-09-19T13:03:00.123456+00:00"
+    """
+    global _timestamp_cache
+    now = time.time()
+    second = int(now)
+    cached_second, prefix = _timestamp_cache
+    if second != cached_second:
+        prefix = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(second))
+        _timestamp_cache = (second, prefix)
+    return f"{prefix}.{int((now - second) * 1_000_000):06d}+00:00"
+
 
 class DatabaseManager:
     """Handles SQLite database operations for the monitoring system."""
@@ -65,20 +142,61 @@ class DatabaseManager:
         """
         Initialize database manager.
         
+        A single connection is kept open for the lifetime of the manager and
+        shared between the MQTT callback thread and the override timer thread,
+        so access to it is serialized with a lock. Sensor readings are buffered
+        and written in batches by a background flush thread.
+        
         Args:
             db_file: Path to SQLite database file
         """
         self.db_file = db_file
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            db_file,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=DB_CACHED_STATEMENTS
+        )
+        self._configure(self._conn)
         self.init_database()
+        
+        # Buffered sensor rows, flushed by size or by the background thread
+        self._pending_sensor: List[Tuple[str, float, float]] = []
+        self._flush_size = SENSOR_FLUSH_SIZE
+        self._flush_interval = SENSOR_FLUSH_INTERVAL
+        self._stop_event = threading.Event()
+        self._flush_thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flush_thread.start()
+        
+        # Latest-readings result, valid while no new sensor row has been written
+        self._last_insert_id = 0
+        self._latest_cache_key: Optional[Tuple[int, int]] = None
+        self._latest_cache_rows: list = []
+    
+    @staticmethod
+    def _configure(conn: sqlite3.Connection):
+        """
+        Apply performance PRAGMAs to a freshly opened connection.
+        
+        journal_mode=WAL is persistent in the database file; the remaining
+        settings are per-connection and must be applied on every connect.
+        
+        Args:
+            conn: Open SQLite connection
+        """
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-20000")  # ~20 MB
+        conn.execute("PRAGMA mmap_size=134217728")  # 128 MB
     
     def init_database(self):
         """Initialize the database and create tables if they don't exist."""
         try:
-            with sqlite3.connect(self.db_file) as conn:
-                cursor = conn.cursor()
-                
+            with self._lock:
                 # Create sensor_data table
-                cursor.execute('''
+                self._conn.execute('''
                     CREATE TABLE IF NOT EXISTS sensor_data (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
                         timestamp TEXT NOT NULL,
@@ -88,7 +206,7 @@ class DatabaseManager:
                 ''')
                 
                 # Create alarms table
-                cursor.execute('''
+                self._conn.execute('''
                     CREATE TABLE IF NOT EXISTS alarms (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
                         timestamp TEXT NOT NULL,
@@ -96,17 +214,74 @@ class DatabaseManager:
                     )
                 ''')
                 
-                conn.commit()
-                logger.info("Database initialized successfully")
+                # Create system_state table (one row per persisted setting)
+                self._conn.execute('''
+                    CREATE TABLE IF NOT EXISTS system_state (
+                        key TEXT PRIMARY KEY,
+                        value TEXT NOT NULL
+                    )
+                ''')
+                
+                # Lets "ORDER BY timestamp DESC LIMIT ?" walk the index instead of sorting
+                self._conn.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_sensor_ts
+                    ON sensor_data(timestamp DESC)
+                ''')
+                self._conn.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_alarms_ts
+                    ON alarms(timestamp DESC)
+                ''')
+                
+            logger.info("Database initialized successfully")
                 
         except Exception as e:
             logger.error(f"Error initializing database: {e}")
             raise
     
+    def _flush_loop(self):
+        """Periodically write buffered sensor rows until the manager is closed."""
+        while not self._stop_event.wait(self._flush_interval):
+            self.flush()
+    
+    def _flush_pending_locked(self):
+        """Write buffered sensor rows in one transaction. Caller must hold the lock."""
+        if not self._pending_sensor:
+            return
+        rows = self._pending_sensor
+        # Take the write lock up front so another writer can't make us fail mid-batch
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.executemany(_SQL_INSERT_SENSOR, rows)
+            self._last_insert_id = self._conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        # Only drop the buffer once the rows are committed; a failed write is retried next flush
+        self._pending_sensor = []
+        logger.debug("Flushed %d sensor readings", len(rows))
+    
+    def flush(self) -> bool:
+        """
+        Write any buffered sensor readings to the database.
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            with self._lock:
+                self._flush_pending_locked()
+            return True
+        except Exception as e:
+            logger.error(f"Error flushing sensor data: {e}")
+            return False
+    
     def store_sensor_data(self, temperature: float, humidity: float) -> bool:
         """
         Store sensor reading in the database.
         
+        The reading is buffered and written with the next batch.
+        
         Args:
             temperature: Temperature reading in Celsius
             humidity: Humidity reading in percentage
@@ -116,17 +291,14 @@ class DatabaseManager:
         """
         try:
             # Store timestamp in UTC for consistency
-            timestamp = datetime.now(timezone.utc).isoformat()
-            
-            with sqlite3.connect(self.db_file) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO sensor_data (timestamp, temperature, humidity)
-                    VALUES (?, ?, ?)
-                ''', (timestamp, temperature, humidity))
-                conn.commit()
+            timestamp = utc_timestamp()
+            
+            with self._lock:
+                self._pending_sensor.append((timestamp, temperature, humidity))
+                if len(self._pending_sensor) >= self._flush_size:
+                    self._flush_pending_locked()
                 
-            logger.debug(f"Stored sensor data: T={temperature}°C, H={humidity}%")
+            logger.debug("Stored sensor data: T=%s°C, H=%s%%", temperature, humidity)
             return True
             
         except Exception as e:
@@ -145,17 +317,12 @@ class DatabaseManager:
         """
         try:
             # Store timestamp in UTC for consistency
-            timestamp = datetime.now(timezone.utc).isoformat()
-            
-            with sqlite3.connect(self.db_file) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO alarms (timestamp, message)
-                    VALUES (?, ?)
-                ''', (timestamp, message))
-                conn.commit()
+            timestamp = utc_timestamp()
+            
+            with self._lock:
+                self._conn.execute(_SQL_INSERT_ALARM, (timestamp, message))
                 
-            logger.debug(f"Stored alarm: {message}")  
+            logger.debug("Stored alarm: %s", message)
             return True
             
         except Exception as e:
@@ -166,6 +333,8 @@ class DatabaseManager:
         """
         Retrieve the latest sensor readings.
         
+        Repeated calls return a cached result until a new reading is written.
+        
         Args:
             limit: Number of records to retrieve
             
@@ -173,41 +342,102 @@ class DatabaseManager:
             List of sensor data tuples
         """
         try:
-            with sqlite3.connect(self.db_file) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT timestamp, temperature, humidity
-                    FROM sensor_data
-                    ORDER BY timestamp DESC
-                    LIMIT ?
-                ''', (limit,))
-                return cursor.fetchall()
+            with self._lock:
+                self._flush_pending_locked()
+                key = (limit, self._last_insert_id)
+                if key != self._latest_cache_key:
+                    cursor = self._conn.execute('''
+                        SELECT timestamp, temperature, humidity
+                        FROM sensor_data
+                        ORDER BY timestamp DESC
+                        LIMIT ?
+                    ''', (limit,))
+                    self._latest_cache_rows = cursor.fetchall()
+                    self._latest_cache_key = key
+                return list(self._latest_cache_rows)
                 
         except Exception as e:
             logger.error(f"Error retrieving sensor data: {e}")
             return []
+    
+    def get_last_relay_state(self) -> Optional[str]:
+        """
+        Get the last persisted relay state.
+        
+        Returns:
+            Last relay state ("ON" or "OFF"), or None if no state was found
+        """
+        try:
+            with self._lock:
+                result = self._conn.execute(_SQL_LOAD_STATE, ("relay_status",)).fetchone()
+            if result:
+                return result[0]
+                    
+        except Exception as e:
+            logger.warning(f"Could not retrieve relay state from database: {e}")
+            
+        return None
+    
+    def save_relay_state(self, status: str) -> bool:
+        """
+        Persist the current relay state so it can be restored on restart.
+        
+        Args:
+            status: Current relay status ("ON" or "OFF")
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            with self._lock:
+                self._conn.execute(_SQL_SAVE_STATE, ("relay_status", status))
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error saving relay state: {e}")
+            return False
+    
+    def close(self):
+        """Flush buffered readings and close the shared database connection."""
+        self._stop_event.set()
+        with self._lock:
+            try:
+                self._flush_pending_locked()
+            except Exception as e:
+                logger.error(f"Error closing database: {e}")
+            finally:
+                self._conn.close()
 
 
 class ServerRoomDataManager:
     """Main data manager for the server room cooling monitor system."""
     
-    def __init__(self, broker: str = MQTT_BROKER, port: int = MQTT_PORT):
+    def __init__(self, broker: str = MQTT_BROKER, port: int = MQTT_PORT, verbose: bool = VERBOSE):
         """
         Initialize the data manager.
         
         Args:
             broker: MQTT broker hostname/IP
             port: MQTT broker port
+            verbose: Echo every sensor reading and relay decision to the console
         """
         self.broker = broker
         self.port = port
+        self.verbose = verbose
         self.client = mqtt.Client("IOT_DATA_MANAGER_ADI_7708", clean_session=True)
         
         # Configure client for better stability
         self.client.max_inflight_messages_set(20)
         self.client.max_queued_messages_set(0)
+        self.client.reconnect_delay_set(
+            min_delay=MQTT_RECONNECT_DELAY_MIN,
+            max_delay=MQTT_RECONNECT_DELAY_MAX
+        )
         self.is_connected = False
         
+        # Database manager
+        self.db_manager = DatabaseManager()
+        
         # System state
         self.relay_status = self._get_last_relay_state()  # Restore from database
         self.last_temperature = None
@@ -217,10 +447,19 @@ class ServerRoomDataManager:
         
         # Manual override state
         self.manual_override_active = False
-        self.manual_override_end_time = None
+        self.manual_override_end_time = None  # time.monotonic() deadline
+        self._override_timer: Optional[threading.Timer] = None
+        self._override_lock = threading.Lock()
         
-        # Database manager
-        self.db_manager = DatabaseManager()
+        # Alarms waiting for the coalescing window to close
+        self._pending_alarms: List[Tuple[str, bytes]] = []
+        self._alarm_lock = threading.Lock()
+        self._alarm_timer: Optional[threading.Timer] = None
+        
+        # Received messages are handled off the MQTT network thread
+        self._msg_queue: "queue.Queue[Optional[Tuple[str, bytes]]]" = queue.Queue(maxsize=MESSAGE_QUEUE_SIZE)
+        self._worker_thread = threading.Thread(target=self._worker, daemon=True)
+        self._worker_thread.start()
         
         # Set up MQTT callbacks
         self.client.on_connect = self._on_connect
@@ -229,9 +468,45 @@ class ServerRoomDataManager:
         self.client.on_subscribe = self._on_subscribe
         self.client.on_publish = self._on_publish
         
+        # Static console text, composed once from the configuration
+        self._status_header = (
+            f"\n{_SEP60}\n"
+            "🏢 SERVER ROOM DATA MANAGER STATUS\n"
+            f"{_SEP60}\n"
+        )
+        self._status_footer = (
+            f"{_DASH60}\n"
+            "📋 Hysteresis Thresholds:\n"
+            f"   🌡️  Temperature: ON>{TEMP_HIGH_THRESHOLD}°C, OFF<{TEMP_LOW_THRESHOLD}°C\n"
+            f"   💧 Humidity: ON>{HUMIDITY_HIGH_THRESHOLD}%, OFF<{HUMIDITY_LOW_THRESHOLD}%\n"
+            f"{_SEP60}\n"
+        )
+        self._instructions_text = (
+            f"\n{_SEP70}\n"
+            "🏢 SERVER ROOM COOLING MONITOR - DATA MANAGER\n"
+            f"{_SEP70}\n"
+            f"📡 MQTT Broker: {self.broker}:{self.port}\n"
+            f"💾 Database: {DATABASE_FILE}\n"
+            f"{_DASH70}\n"
+            "📢 SUBSCRIBED TOPICS:\n"
+            f"   • {TOPIC_SENSOR_DHT} (temperature & humidity)\n"
+            f"   • {TOPIC_BUTTON} (manual override)\n"
+            "📤 PUBLISHED TOPICS:\n"
+            f"   • {TOPIC_RELAY} (relay control)\n"
+            f"   • {TOPIC_ALARM} (alarm messages)\n"
+            f"{_DASH70}\n"
+            "🔄 OPERATION:\n"
+            "   • Processing sensor data and storing in database\n"
+            "   • Applying hysteresis logic for fan control\n"
+            "   • Publishing relay commands and alarms\n"
+            "   • Press Ctrl+C to stop the data manager\n"
+            f"{_SEP70}\n"
+            "🟢 Data manager is running! Processing messages...\n\n"
+        )
+        
         # Log initial relay status
         print(f"🔄 Initial relay status: {self.relay_status}")
-        logger.info(f"Restored relay status from database: {self.relay_status}")
+        logger.info("Restored relay status from database: %s", self.relay_status)
     
     def _get_last_relay_state(self) -> str:
         """
@@ -240,29 +515,8 @@ class ServerRoomDataManager:
         Returns:
             Last relay state ("ON" or "OFF"), defaults to "OFF"
         """
-        try:
-            with sqlite3.connect(DATABASE_FILE) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT message FROM alarms 
-                    WHERE message LIKE '%fan turned%' OR message LIKE '%Manual button toggle%'
-                    ORDER BY timestamp DESC 
-                    LIMIT 1
-                ''')
-                
-                result = cursor.fetchone()
-                if result:
-                    message = result[0].lower()
-                    if 'fan on' in message or 'turned on' in message:
-                        return "ON"
-                    elif 'fan off' in message or 'turned off' in message:
-                        return "OFF"
-                        
-        except Exception as e:
-            logger.warning(f"Could not retrieve relay state from database: {e}")
-            
         # Default to OFF if no state found
-        return "OFF"
+        return self.db_manager.get_last_relay_state() or "OFF"
     
     def _save_relay_state(self, status: str):
         """
@@ -271,31 +525,26 @@ class ServerRoomDataManager:
         Args:
             status: Current relay status ("ON" or "OFF")
         """
-        try:
-            # This is handled by the existing alarm storage system
-            # No additional storage needed as alarms contain relay state changes
-            pass
-        except Exception as e:
-            logger.error(f"Error saving relay state: {e}")
+        self.db_manager.save_relay_state(status)
     
     def _on_connect(self, client, userdata, flags, rc):
         """Callback for when the client receives a CONNACK response from the server."""
         if rc == 0:
             self.is_connected = True
-            logger.info(f"Connected to MQTT broker at {self.broker}:{self.port}")
+            logger.info("Connected to MQTT broker at %s:%s", self.broker, self.port)
             
             # Subscribe to sensor and button topics
             topics = [(TOPIC_SENSOR_DHT, 1), (TOPIC_BUTTON, 1)]
             for topic, qos in topics:
                 result = client.subscribe(topic, qos)
                 if result[0] == mqtt.MQTT_ERR_SUCCESS:
-                    logger.info(f"Subscribed to topic: {topic}")
+                    logger.info("Subscribed to topic: %s", topic)
                 else:
                     logger.error(f"Failed to subscribe to topic: {topic}")
                     
-            # Publish current relay status to synchronize system
-            self._publish_relay_command(self.relay_status)
-            print(f"   📤 Published initial relay status: {self.relay_status}")
+            # Publish current relay status to synchronize system; this echo is
+            # repeated on every reconnect, so it need not wait on a PUBACK
+            self._publish_relay_command(self.relay_status, qos=0)
         else:
             logger.error(f"Failed to connect to MQTT broker. Return code: {rc}")
     
@@ -309,73 +558,102 @@ class ServerRoomDataManager:
     
     def _on_subscribe(self, client, userdata, mid, granted_qos):
         """Callback for when the client receives a SUBACK response from the server."""
-        logger.debug(f"Subscription confirmed with message ID: {mid}, QoS: {granted_qos}")
+        logger.debug("Subscription confirmed with message ID: %s, QoS: %s", mid, granted_qos)
     
     def _on_publish(self, client, userdata, mid):
         """Callback for when a message is published."""
-        logger.debug(f"Message {mid} published successfully")
+        logger.debug("Message %s published successfully", mid)
     
     def _on_message(self, client, userdata, msg):
         """
         Callback for when a message is received from the broker.
         
+        The message is only queued here so that parsing, SQLite writes and
+        publishes never hold up paho's network loop.
+        
         Args:
             client: The client instance
             userdata: User data
             msg: The message instance
         """
+        item = (msg.topic, msg.payload)
         try:
-            topic = msg.topic
-            payload = msg.payload.decode('utf-8')
-            
-            logger.debug(f"Received message on topic '{topic}': {payload}")
+            self._msg_queue.put_nowait(item)
+        except queue.Full:
+            # Drop the oldest message so the newest readings win
+            try:
+                self._msg_queue.get_nowait()
+            except queue.Empty:
+                pass
+            logger.warning("Message queue full, dropped oldest message")
+            self._msg_queue.put_nowait(item)
+    
+    def _worker(self):
+        """Dispatch queued messages until a None sentinel is received."""
+        while True:
+            item = self._msg_queue.get()
+            if item is None:
+                return
             
-            if topic == TOPIC_SENSOR_DHT:
-                self._handle_sensor_data(payload)
-            elif topic == TOPIC_BUTTON:
-                self._handle_button_press(payload)
-            else:
-                logger.warning(f"Received message on unexpected topic: {topic}")
+            topic, payload = item
+            try:
+                logger.debug("Received message on topic '%s': %s", topic, payload)
                 
-        except Exception as e:
-            logger.error(f"Error processing received message: {e}")
+                if topic == TOPIC_SENSOR_DHT:
+                    # Sensor JSON is parsed straight from the raw bytes
+                    self._handle_sensor_data(payload)
+                elif topic == TOPIC_BUTTON:
+                    self._handle_button_press(payload.decode('utf-8'))
+                else:
+                    logger.warning(f"Received message on unexpected topic: {topic}")
+                    
+            except Exception as e:
+                logger.error(f"Error processing received message: {e}")
     
-    def _handle_sensor_data(self, payload: str):
+    def _handle_sensor_data(self, payload: bytes):
         """
         Handle incoming sensor data from DHT sensor.
         
         Args:
-            payload: JSON string containing temperature and humidity
+            payload: Raw JSON payload containing temperature and humidity
         """
         try:
-            # Parse JSON data
-            data = json.loads(payload)
-            temperature = float(data.get('temp', 0))
-            humidity = float(data.get('hum', 0))
+            # Extract both readings in one scan, falling back to a full JSON parse
+            match = _DHT_RE.search(payload)
+            if match:
+                temperature = float(match.group(1))
+                humidity = float(match.group(2))
+            else:
+                data = json_loads(payload)
+                temperature = float(data.get('temp', 0))
+                humidity = float(data.get('hum', 0))
             
             # Update internal state
             self.last_temperature = temperature
             self.last_humidity = humidity
             self.sensor_data_count += 1
-            
-            # Print received data
-            print(f"\n📊 SENSOR DATA RECEIVED:")
-            print(f"   🌡️  Temperature: {temperature}°C")
-            print(f"   💧 Humidity: {humidity}%")
-            print(f"   ⏰ Time: {datetime.now().strftime('%H:%M:%S')}")
+            logger.debug("Sensor reading T=%.1f°C H=%.1f%%", temperature, humidity)
             
             # Store in database
-            if self.db_manager.store_sensor_data(temperature, humidity):
-                print(f"   💾 Stored in database (#{self.sensor_data_count})")
-            else:
-                print(f"   ❌ Failed to store in database")
+            stored = self.db_manager.store_sensor_data(temperature, humidity)
             
             # Apply hysteresis logic (includes manual override check)
-            self._apply_hysteresis_logic(temperature, humidity)
+            relay_line = self._apply_hysteresis_logic(temperature, humidity)
+            
+            if self.verbose:
+                store_line = (f"   💾 Stored in database (#{self.sensor_data_count})" if stored
+                              else "   ❌ Failed to store in database")
+                sys.stdout.write(
+                    f"\n📊 SENSOR DATA RECEIVED:\n"
+                    f"   🌡️  Temperature: {temperature}°C\n"
+                    f"   💧 Humidity: {humidity}%\n"
+                    f"   ⏰ Time: {datetime.now().strftime('%H:%M:%S')}\n"
+                    f"{store_line}\n"
+                    f"{relay_line}\n"
+                )
             
         except (json.JSONDecodeError, ValueError, KeyError) as e:
-            logger.error(f"Error parsing sensor data: {e}")
-            print(f"❌ Invalid sensor data format: {payload}")
+            logger.error(f"Error parsing sensor data: {e} (payload: {payload!r})")
         except Exception as e:
             logger.error(f"Error handling sensor data: {e}")
     
@@ -387,18 +665,15 @@ class ServerRoomDataManager:
             payload: Button event message
         """
         try:
-            print(f"\n🔘 BUTTON PRESSED:")
-            print(f"   📤 Message: {payload}")
-            print(f"   ⏰ Time: {datetime.now().strftime('%H:%M:%S')}")
-            
             # Toggle relay control - Manual override
             old_status = self.relay_status
             new_status = "OFF" if self.relay_status == "ON" else "ON"
             
             # Update relay status
             self.relay_status = new_status
+            self._save_relay_state(new_status)
             
-            print(f"   🔄 Manual toggle: {old_status} → {new_status}")
+            logger.info("Button pressed (%s): manual toggle %s → %s", payload, old_status, new_status)
             
             # Publish relay command
             self._publish_relay_command(new_status)
@@ -412,7 +687,15 @@ class ServerRoomDataManager:
             # Store alarm in database
             self.db_manager.store_alarm(alarm_message)
             
-            print(f"   🚨 Manual override: Fan {new_status}")
+            if self.verbose:
+                sys.stdout.write(
+                    f"\n🔘 BUTTON PRESSED:\n"
+                    f"   📤 Message: {payload}\n"
+                    f"   ⏰ Time: {datetime.now().strftime('%H:%M:%S')}\n"
+                    f"   🔄 Manual toggle: {old_status} → {new_status}\n"
+                    f"   🚨 Manual override: Fan {new_status}\n"
+                )
+                sys.stdout.flush()
             
         except Exception as e:
             logger.error(f"Error handling button press: {e}")
@@ -424,42 +707,53 @@ class ServerRoomDataManager:
         Returns:
             True if manual override is active, False otherwise
         """
-        if not self.manual_override_active:
-            return False
-        
-        # Override is active - show remaining time if end time is set
+        return self.manual_override_active
+    
+    def _override_status_line(self) -> str:
+        """Describe the active manual override, including remaining time if known."""
         if self.manual_override_end_time:
-            current_time = time.time()
-            remaining_time = max(0, int(self.manual_override_end_time - current_time))
-            print(f"   🔒 Manual override active ({remaining_time}s remaining)")
-        else:
-            print(f"   🔒 Manual override active")
-            
-        return True
+            remaining_time = max(0, int(self.manual_override_end_time - time.monotonic()))
+            return f"   🔒 Manual override active ({remaining_time}s remaining)"
+        return "   🔒 Manual override active"
     
     def _activate_manual_override(self):
         """Activate manual override for the configured duration."""
-        self.manual_override_active = True
-        self.manual_override_end_time = time.time() + MANUAL_OVERRIDE_DURATION
-        print(f"   🔒 Manual override activated for {MANUAL_OVERRIDE_DURATION} seconds")
-        logger.info(f"Manual override activated for {MANUAL_OVERRIDE_DURATION} seconds")
-        
-        import threading
-        def timeout_callback():
-            time.sleep(MANUAL_OVERRIDE_DURATION)
-            if self.manual_override_active:
-                self.manual_override_active = False
-                self.manual_override_end_time = None
-                print(f"\n⚠️  WARNING: Manual override expired - returning to automatic control")
-                print(f"   🔄 System will now resume automatic fan control based on temperature/humidity")
-                logger.warning("Manual override period expired, returning to automatic control")
-                
-                expiry_alarm = "Manual override expired - Automatic control resumed"
-                self._publish_alarm(expiry_alarm)
-                self.db_manager.store_alarm(expiry_alarm)
+        with self._override_lock:
+            self.manual_override_active = True
+            self.manual_override_end_time = time.monotonic() + MANUAL_OVERRIDE_DURATION
+            
+            # A new press restarts the override window instead of stacking timers
+            if self._override_timer is not None:
+                self._override_timer.cancel()
+            self._override_timer = threading.Timer(MANUAL_OVERRIDE_DURATION, self._on_override_expire)
+            self._override_timer.daemon = True
+            self._override_timer.start()
+        logger.info("Manual override activated for %s seconds", MANUAL_OVERRIDE_DURATION)
+    
+    def _on_override_expire(self):
+        """Return to automatic control once the manual override window has elapsed."""
+        with self._override_lock:
+            # cancel() cannot stop a timer that has already fired: a press that landed
+            # meanwhile replaced this timer and moved the deadline, so leave its override alone
+            if threading.current_thread() is not self._override_timer:
+                return
+            self._override_timer = None
+            if not self.manual_override_active or time.monotonic() < self.manual_override_end_time:
+                return
+            self.manual_override_active = False
+            self.manual_override_end_time = None
+        
+        logger.warning("Manual override period expired, returning to automatic control")
+        if self.verbose:
+            sys.stdout.write(
+                "\n⚠️  WARNING: Manual override expired - returning to automatic control\n"
+                "   🔄 System will now resume automatic fan control based on temperature/humidity\n"
+            )
+            sys.stdout.flush()
         
-        timer_thread = threading.Thread(target=timeout_callback, daemon=True)
-        timer_thread.start()
+        expiry_alarm = "Manual override expired - Automatic control resumed"
+        self._publish_alarm(expiry_alarm)
+        self.db_manager.store_alarm(expiry_alarm)
     
     def _apply_hysteresis_logic(self, temperature: float, humidity: float):
         """
@@ -468,39 +762,24 @@ class ServerRoomDataManager:
         Args:
             temperature: Current temperature in Celsius
             humidity: Current humidity in percentage
+            
+        Returns:
+            Console summary of the decision, shown with the sensor reading in verbose mode
         """
         try:
             if self._check_manual_override():
-                print(f"   ⚡ Relay status: {self.relay_status} (manual override)")
-                return
+                return (f"{self._override_status_line()}\n"
+                        f"   ⚡ Relay status: {self.relay_status} (manual override)")
             
             old_status = self.relay_status
-            new_status = old_status
-            
-            # Hysteresis logic
-            if self.relay_status == "OFF":
-                # Turn ON if temperature OR humidity exceeds high threshold
-                if temperature > TEMP_HIGH_THRESHOLD or humidity > HUMIDITY_HIGH_THRESHOLD:
-                    new_status = "ON"
-                    reason = []
-                    if temperature > TEMP_HIGH_THRESHOLD:
-                        reason.append(f"temp {temperature}°C > {TEMP_HIGH_THRESHOLD}°C")
-                    if humidity > HUMIDITY_HIGH_THRESHOLD:
-                        reason.append(f"humidity {humidity}% > {HUMIDITY_HIGH_THRESHOLD}%")
-                    trigger_reason = " OR ".join(reason)
-                    
-            elif self.relay_status == "ON":
-                # Turn OFF only if BOTH temperature AND humidity are below low thresholds
-                if temperature < TEMP_LOW_THRESHOLD and humidity < HUMIDITY_LOW_THRESHOLD:
-                    new_status = "OFF"
-                    trigger_reason = f"temp {temperature}°C < {TEMP_LOW_THRESHOLD}°C AND humidity {humidity}% < {HUMIDITY_LOW_THRESHOLD}%"
+            new_status, should_switch = _TRANSITIONS[old_status]
             
             # Check if relay status changed
-            if new_status != old_status:
+            if should_switch(temperature, humidity):
+                trigger_reason = self._trigger_reason(new_status, temperature, humidity)
                 self.relay_status = new_status
-                print(f"\n⚡ RELAY CONTROL:")
-                print(f"   🔄 Status change: {old_status} → {new_status}")
-                print(f"   📋 Reason: {trigger_reason}")
+                self._save_relay_state(new_status)
+                logger.info("Relay status change: %s → %s (%s)", old_status, new_status, trigger_reason)
                 
                 # Publish relay command
                 self._publish_relay_command(new_status)
@@ -510,34 +789,61 @@ class ServerRoomDataManager:
                 self._publish_alarm(alarm_message)
                 self.db_manager.store_alarm(alarm_message)
                 
-            else:
-                # No change - show current status
-                print(f"   ⚡ Relay status: {self.relay_status} (no change)")
+                return (f"\n⚡ RELAY CONTROL:\n"
+                        f"   🔄 Status change: {old_status} → {new_status}\n"
+                        f"   📋 Reason: {trigger_reason}")
+            
+            # No change - show current status
+            return f"   ⚡ Relay status: {self.relay_status} (no change)"
                 
         except Exception as e:
             logger.error(f"Error in hysteresis logic: {e}")
+            return "   ❌ Hysteresis logic failed"
     
-    def _publish_relay_command(self, command: str):
+    @staticmethod
+    def _trigger_reason(new_status: str, temperature: float, humidity: float) -> str:
+        """
+        Describe which thresholds caused a relay transition.
+        
+        Args:
+            new_status: Relay state being switched to
+            temperature: Current temperature in Celsius
+            humidity: Current humidity in percentage
+            
+        Returns:
+            Human-readable trigger reason for logs and alarms
+        """
+        if new_status == "OFF":
+            return f"temp {temperature}°C < {TEMP_LOW_THRESHOLD}°C AND humidity {humidity}% < {HUMIDITY_LOW_THRESHOLD}%"
+        
+        reason = []
+        if temperature > TEMP_HIGH_THRESHOLD:
+            reason.append(f"temp {temperature}°C > {TEMP_HIGH_THRESHOLD}°C")
+        if humidity > HUMIDITY_HIGH_THRESHOLD:
+            reason.append(f"humidity {humidity}% > {HUMIDITY_HIGH_THRESHOLD}%")
+        return " OR ".join(reason)
+    
+    def _publish_relay_command(self, command: str, qos: int = 1):
         """
         Publish relay control command to MQTT.
         
         Args:
             command: Relay command ("ON" or "OFF")
+            qos: MQTT QoS level; fan state changes use 1 so the broker
+                delivers (and queues for persistent sessions) them
         """
         try:
             if not self.is_connected:
                 logger.warning("Not connected to MQTT broker. Cannot publish relay command.")
                 return False
             
-            result = self.client.publish(TOPIC_RELAY, command, qos=1)
+            result = self.client.publish(TOPIC_RELAY, command, qos=qos)
             
             if result.rc == mqtt.MQTT_ERR_SUCCESS:
-                print(f"   📤 Published relay command: {command}")
-                logger.info(f"Published relay command: {command}")
+                logger.info("Published relay command: %s", command)
                 return True
             else:
                 logger.error(f"Failed to publish relay command. Return code: {result.rc}")
-                print(f"   ❌ Failed to publish relay command")
                 return False
                 
         except Exception as e:
@@ -546,149 +852,114 @@ class ServerRoomDataManager:
     
     def _publish_alarm(self, message: str):
         """
-        Publish alarm message to MQTT.
+        Queue an alarm message for publishing to MQTT.
+        
+        Alarms raised within ALARM_COALESCE_WINDOW of each other are sent
+        together by _flush_alarms.
         
         Args:
             message: Alarm message
         """
+        if not self.is_connected:
+            logger.warning("Not connected to MQTT broker. Cannot publish alarm.")
+            return False
+        
+        # Encode alarm data with timestamp in UTC
+        alarm_json = _ALARM_TPL % (utc_timestamp().encode(), json_dumps(message))
+        
+        with self._alarm_lock:
+            self._pending_alarms.append((message, alarm_json))
+            if self._alarm_timer is None:
+                self._alarm_timer = threading.Timer(ALARM_COALESCE_WINDOW, self._flush_alarms)
+                self._alarm_timer.daemon = True
+                self._alarm_timer.start()
+        return True
+    
+    def _flush_alarms(self):
+        """
+        Publish queued alarms at QoS 1.
+        
+        A single alarm is sent as a JSON object; a burst is sent as a JSON array.
+        """
+        with self._alarm_lock:
+            if self._alarm_timer is not None:
+                self._alarm_timer.cancel()
+                self._alarm_timer = None
+            alarms = self._pending_alarms
+            self._pending_alarms = []
+        if not alarms:
+            return
+        
         try:
-            if not self.is_connected:
-                logger.warning("Not connected to MQTT broker. Cannot publish alarm.")
-                return False
-            
-            # Create alarm data with timestamp in UTC
-            alarm_data = {
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "message": message,
-                "level": "warning"
-            }
-            
-            json_payload = json.dumps(alarm_data)
+            if len(alarms) == 1:
+                json_payload = alarms[0][1]
+            else:
+                json_payload = b"[" + b",".join(alarm_json for _, alarm_json in alarms) + b"]"
             result = self.client.publish(TOPIC_ALARM, json_payload, qos=1)
             
             if result.rc == mqtt.MQTT_ERR_SUCCESS:
-                print(f"   🚨 Published alarm: {message}")
-                logger.info(f"Published alarm: {message}")
-                self.alarm_count += 1
-                return True
+                for message, _ in alarms:
+                    logger.info("Published alarm: %s", message)
+                self.alarm_count += len(alarms)
             else:
                 logger.error(f"Failed to publish alarm. Return code: {result.rc}")
-                print(f"   ❌ Failed to publish alarm")
-                return False
                 
         except Exception as e:
             logger.error(f"Error publishing alarm: {e}")
-            return False
-    
-    def connect(self) -> bool:
-        """
-        Connect to the MQTT broker.
-        
-        Returns:
-            True if connection successful, False otherwise
-        """
-        try:
-            logger.info(f"Connecting to MQTT broker at {self.broker}:{self.port}...")
-            self.client.connect(self.broker, self.port, MQTT_KEEPALIVE)
-            self.client.loop_start()
-            
-            # Wait for connection to be established
-            timeout = 10  # seconds
-            start_time = time.time()
-            while not self.is_connected and (time.time() - start_time) < timeout:
-                time.sleep(0.1)
-            
-            return self.is_connected
-            
-        except Exception as e:
-            logger.error(f"Error connecting to MQTT broker: {e}")
-            return False
     
     def disconnect(self):
         """Disconnect from the MQTT broker."""
+        # Let the worker finish what is already queued before tearing down
+        self._msg_queue.put(None)
+        self._worker_thread.join(timeout=MQTT_CONNECT_TIMEOUT)
+        self._flush_alarms()
         try:
             self.client.loop_stop()
             self.client.disconnect()
             logger.info("Disconnected from MQTT broker")
         except Exception as e:
             logger.error(f"Error disconnecting from MQTT broker: {e}")
+        
+        with self._override_lock:
+            if self._override_timer is not None:
+                self._override_timer.cancel()
+        self.db_manager.close()
     
     def display_status(self):
         """Display current system status."""
-        connection_icon = "🟢" if self.is_connected else "🔴"
-        relay_icon = "🟢" if self.relay_status == "ON" else "🔴"
-        
-        print("\n" + "="*60)
-        print("🏢 SERVER ROOM DATA MANAGER STATUS")
-        print("="*60)
-        print(f"📡 MQTT Connection: {connection_icon} {'Connected' if self.is_connected else 'Disconnected'}")
-        print(f"⚡ Relay Status: {relay_icon} {self.relay_status}")
+        readings = ""
         if self.last_temperature is not None and self.last_humidity is not None:
-            print(f"🌡️  Last Temperature: {self.last_temperature}°C")
-            print(f"💧 Last Humidity: {self.last_humidity}%")
-        print(f"📊 Sensor Readings: {self.sensor_data_count}")
-        print(f"🚨 Alarms Generated: {self.alarm_count}")
-        print("-"*60)
-        print(f"📋 Hysteresis Thresholds:")
-        print(f"   🌡️  Temperature: ON>{TEMP_HIGH_THRESHOLD}°C, OFF<{TEMP_LOW_THRESHOLD}°C")
-        print(f"   💧 Humidity: ON>{HUMIDITY_HIGH_THRESHOLD}%, OFF<{HUMIDITY_LOW_THRESHOLD}%")
-        print("="*60)
+            readings = (f"🌡️  Last Temperature: {self.last_temperature}°C\n"
+                        f"💧 Last Humidity: {self.last_humidity}%\n")
+        sys.stdout.write(
+            f"{self._status_header}"
+            f"📡 MQTT Connection: {_CONNECTION_DISPLAY[self.is_connected]}\n"
+            f"⚡ Relay Status: {_ICON[self.relay_status]} {self.relay_status}\n"
+            f"{readings}"
+            f"📊 Sensor Readings: {self.sensor_data_count}\n"
+            f"🚨 Alarms Generated: {self.alarm_count}\n"
+            f"{self._status_footer}"
+        )
+        sys.stdout.flush()
     
     def display_instructions(self):
         """Display user instructions."""
-        print("\n" + "="*70)
-        print("🏢 SERVER ROOM COOLING MONITOR - DATA MANAGER")
-        print("="*70)
-        print(f"📡 MQTT Broker: {self.broker}:{self.port}")
-        print(f"💾 Database: {DATABASE_FILE}")
-        print("-"*70)
-        print("📢 SUBSCRIBED TOPICS:")
-        print(f"   • {TOPIC_SENSOR_DHT} (temperature & humidity)")
-        print(f"   • {TOPIC_BUTTON} (manual override)")
-        print("📤 PUBLISHED TOPICS:")
-        print(f"   • {TOPIC_RELAY} (relay control)")
-        print(f"   • {TOPIC_ALARM} (alarm messages)")
-        print("-"*70)
-        print("🔄 OPERATION:")
-        print("   • Processing sensor data and storing in database")
-        print("   • Applying hysteresis logic for fan control")
-        print("   • Publishing relay commands and alarms")
-        print("   • Press Ctrl+C to stop the data manager")
-        print("="*70)
-        print("🟢 Data manager is running! Processing messages...\n")
+        sys.stdout.write(self._instructions_text)
+        sys.stdout.flush()
     
     def run(self):
         """Run the data manager continuously."""
         logger.info("Starting Server Room Data Manager...")
         
-        # Connect to MQTT broker
-        if not self.connect():
-            logger.error("Failed to connect to MQTT broker. Exiting.")
-            print("❌ Failed to connect to MQTT broker!")
-            print("   Make sure the MQTT broker is running on localhost:1883")
-            return
+        # paho connects in the background and reconnects with backoff on its own
+        self.client.connect_async(self.broker, self.port, MQTT_KEEPALIVE)
         
         # Display instructions and initial status
         self.display_instructions()
         self.display_status()
         
         try:
-            # Keep the script running to process messages
-            while True:
-                if not self.is_connected:
-                    logger.warning("Connection lost. Attempting to reconnect...")
-                    print("\n⚠️  Connection lost. Reconnecting...")
-                    if self.connect():
-                        print("✅ Reconnected successfully!")
-                        self.display_status()
-                    else:
-                        print("❌ Reconnection failed. Retrying in 5 seconds...")
-                        time.sleep(5)
-                        continue
-                
-                # Sleep briefly to prevent high CPU usage
-                time.sleep(0.1)
-                
+            self.client.loop_forever(retry_first_connection=True)
         except KeyboardInterrupt:
             print("\n\n👋 Received interrupt signal. Shutting down...")
         except Exception as e:
@@ -10,16 +10,23 @@ This simulates a manual override button that could be used to trigger cooling sy
 actions or acknowledge alarms in the server room monitoring system.
 """
 
+import asyncio
+import sys
+import threading
 import time
 import logging
 from typing import Optional
 import paho.mqtt.client as mqtt
+from mqtt_pool import MQTTPool
 
 # Configuration
 MQTT_BROKER = "broker.hivemq.com"
 MQTT_PORT = 1883
 MQTT_TOPIC = "server_room/control/button"
 BUTTON_MESSAGE = "pressed"
+BUTTON_MESSAGE_BYTES = BUTTON_MESSAGE.encode('ascii')  # encoded once instead of by paho on every publish
+BUTTON_QOS = 0  # presses are human-driven; at-most-once needs no PUBACK round trip
+PUBLISH_TIMEOUT = 2.0  # seconds to wait for paho to actually send a press
 
 # Setup logging
 logging.basicConfig(
@@ -29,6 +36,19 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# Formatted local time, refreshed only when the second changes
+_ts_cache = [0, ""]
+
+
+def _ts() -> str:
+    """Return the current local time as 'YYYY-MM-DD HH:MM:SS', cached per second."""
+    now = int(time.time())
+    if now != _ts_cache[0]:
+        _ts_cache[0] = now
+        _ts_cache[1] = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now))
+    return _ts_cache[1]
+
+
 class ButtonEmulator:
     """Emulates a physical button that publishes MQTT messages when activated."""
     
@@ -42,35 +62,39 @@ class ButtonEmulator:
         """
         self.broker = broker
         self.port = port
-        self.client = mqtt.Client()
         self.is_connected = False
+        self._connected_event = threading.Event()
         self.press_count = 0
         
-        # Set up MQTT callbacks
-        self.client.on_connect = self._on_connect
-        self.client.on_disconnect = self._on_disconnect
-        self.client.on_publish = self._on_publish
+        # Set from paho's network thread when CONNACK arrives during connect_async()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._connected_async: Optional[asyncio.Event] = None
+        
+        # Shared MQTT client; connection events are delivered through the pool
+        self.client = MQTTPool.get(broker, port, self._on_connect, self._on_disconnect)
     
     def _on_connect(self, client, userdata, flags, rc):
         """Callback for when the client receives a CONNACK response from the server."""
         if rc == 0:
             self.is_connected = True
-            logger.info(f"Connected to MQTT broker at {self.broker}:{self.port}")
+            self._connected_event.set()
+            logger.info("Connected to MQTT broker at %s:%s", self.broker, self.port)
+            # Local copies: connect_async() may be clearing these on the event loop
+            loop, connected_async = self._loop, self._connected_async
+            if loop is not None and connected_async is not None:
+                loop.call_soon_threadsafe(connected_async.set)
         else:
-            logger.error(f"Failed to connect to MQTT broker. Return code: {rc}")
+            logger.error("Failed to connect to MQTT broker. Return code: %s", rc)
     
     def _on_disconnect(self, client, userdata, rc):
         """Callback for when the client disconnects from the broker."""
         self.is_connected = False
+        self._connected_event.clear()
         if rc != 0:
             logger.warning("Unexpected disconnection from MQTT broker")
         else:
             logger.info("Disconnected from MQTT broker")
     
-    def _on_publish(self, client, userdata, mid):
-        """Callback for when a message is published."""
-        logger.debug(f"Message {mid} published successfully")
-    
     def connect(self) -> bool:
         """
         Connect to the MQTT broker.
@@ -79,30 +103,51 @@ class ButtonEmulator:
             True if connection successful, False otherwise
         """
         try:
-            logger.info(f"Connecting to MQTT broker at {self.broker}:{self.port}...")
-            self.client.connect(self.broker, self.port)
-            self.client.loop_start()
-            
+            # The shared client connects (and reconnects) on its own network thread
             # Wait for connection to be established
             timeout = 10  # seconds
-            start_time = time.time()
-            while not self.is_connected and (time.time() - start_time) < timeout:
-                time.sleep(0.1)
+            return self._connected_event.wait(timeout=timeout)
+            
+        except Exception as e:
+            logger.error("Error connecting to MQTT broker: %s", e)
+            return False
+    
+    async def connect_async(self) -> bool:
+        """
+        Connect to the MQTT broker without blocking the event loop.
+        
+        Returns:
+            True if connection successful, False otherwise
+        """
+        try:
+            # Create the event before publishing the loop so _on_connect never sees a loop without it
+            self._connected_async = asyncio.Event()
+            self._loop = asyncio.get_running_loop()
+            if self.is_connected:
+                return True
+            
+            # Wait for CONNACK to be delivered from paho's network thread
+            timeout = 10  # seconds
+            try:
+                await asyncio.wait_for(self._connected_async.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self._loop = None
             
             return self.is_connected
             
         except Exception as e:
-            logger.error(f"Error connecting to MQTT broker: {e}")
+            logger.error("Error connecting to MQTT broker: %s", e)
             return False
     
     def disconnect(self):
         """Disconnect from the MQTT broker."""
         try:
-            self.client.loop_stop()
-            self.client.disconnect()
+            MQTTPool.release(self.client, self._on_connect, self._on_disconnect)
             logger.info("Disconnected from MQTT broker")
         except Exception as e:
-            logger.error(f"Error disconnecting from MQTT broker: {e}")
+            logger.error("Error disconnecting from MQTT broker: %s", e)
     
     def publish_button_press(self) -> bool:
         """
@@ -121,21 +166,30 @@ class ButtonEmulator:
             self.press_count += 1
             
             # Publish button press message
-            result = self.client.publish(MQTT_TOPIC, BUTTON_MESSAGE, qos=1)
+            sent_at = time.monotonic()
+            result = self.client.publish(MQTT_TOPIC, BUTTON_MESSAGE_BYTES, qos=BUTTON_QOS)
             
-            if result.rc == mqtt.MQTT_ERR_SUCCESS:
-                print(f"\n🔘 BUTTON PRESSED! (#{self.press_count})")
-                print(f"📤 Published '{BUTTON_MESSAGE}' to topic '{MQTT_TOPIC}'")
-                print(f"⏰ Timestamp: {time.strftime('%Y-%m-%d %H:%M:%S')}")
-                logger.info(f"Button press #{self.press_count} published successfully")
-                return True
-            else:
-                logger.error(f"Failed to publish button press. Return code: {result.rc}")
+            if result.rc != mqtt.MQTT_ERR_SUCCESS:
+                logger.error("Failed to publish button press. Return code: %s", result.rc)
                 print("❌ Failed to publish button press message!")
                 return False
+            
+            # rc only means "queued"; wait until paho has really sent it before reporting success
+            result.wait_for_publish(timeout=PUBLISH_TIMEOUT)
+            if not result.is_published():
+                logger.error("Button press #%s not sent within %ss", self.press_count, PUBLISH_TIMEOUT)
+                print("❌ Button press message was not delivered in time!")
+                return False
+            
+            latency_ms = (time.monotonic() - sent_at) * 1000
+            print(f"\n🔘 BUTTON PRESSED! (#{self.press_count})")
+            print(f"📤 Published '{BUTTON_MESSAGE}' to topic '{MQTT_TOPIC}' in {latency_ms:.1f} ms")
+            print(f"⏰ Timestamp: {_ts()}")
+            logger.info("Button press #%s published successfully", self.press_count)
+            return True
                 
         except Exception as e:
-            logger.error(f"Error publishing button press: {e}")
+            logger.error("Error publishing button press: %s", e)
             print(f"❌ Error: {e}")
             return False
     
@@ -157,10 +211,17 @@ class ButtonEmulator:
     
     def run(self):
         """Run the button emulator interactively."""
+        try:
+            asyncio.run(self.run_async())
+        except KeyboardInterrupt:
+            pass
+    
+    async def run_async(self):
+        """Run the button emulator, reading button presses from stdin asynchronously."""
         logger.info("Starting Button Emulator...")
         
         # Connect to MQTT broker
-        if not self.connect():
+        if not await self.connect_async():
             logger.error("Failed to connect to MQTT broker. Exiting.")
             print("❌ Failed to connect to MQTT broker!")
             print("   Make sure the MQTT broker is running on localhost:1883")
@@ -169,34 +230,51 @@ class ButtonEmulator:
         # Display instructions
         self.display_instructions()
         
+        # Non-blocking stdin so other coroutines can run between key presses
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+        
         try:
             while True:
-                try:
-                    # Wait for user input
-                    user_input = input("Press ENTER to activate button (or 'quit' to exit): ").strip().lower()
-                    
-                    # Check for exit commands
-                    if user_input in ['quit', 'exit', 'q']:
-                        print("\n👋 Shutting down button emulator...")
-                        break
-                    
-                    # If user pressed Enter (empty input) or any other text, treat as button press
-                    success = self.publish_button_press()
-                    
-                    if not success:
-                        print("⚠️  Button press failed. Check MQTT connection.")
-                    
-                    print()  # Add spacing for readability
-                    
-                except EOFError:
+                # Wait for user input
+                sys.stdout.write("Press ENTER to activate button (or 'quit' to exit): ")
+                sys.stdout.flush()
+                line = await reader.readline()
+                
+                if not line:
                     # Handle Ctrl+D
                     print("\n\n👋 Received EOF. Shutting down...")
                     break
+                
+                user_input = line.decode().strip().lower()
+                
+                # Check for exit commands
+                if user_input in ['quit', 'exit', 'q']:
+                    print("\n👋 Shutting down button emulator...")
+                    break
+                
+                # Reconnect without blocking the event loop if the connection dropped
+                if not self.is_connected:
+                    logger.warning("Not connected to MQTT broker. Attempting to reconnect...")
+                    await self.connect_async()
+                
+                # If user pressed Enter (empty input) or any other text, treat as button press
+                # Publishing waits for delivery, so keep it off the event loop
+                # (run_in_executor rather than asyncio.to_thread, which needs 3.9)
+                success = await loop.run_in_executor(None, self.publish_button_press)
+                
+                if not success:
+                    print("⚠️  Button press failed. Check MQTT connection.")
+                
+                print()  # Add spacing for readability
                     
-        except KeyboardInterrupt:
+        except asyncio.CancelledError:
+            # asyncio.run() cancels this task on Ctrl+C
             print("\n\n👋 Received interrupt signal. Shutting down...")
+            raise
         except Exception as e:
-            logger.error(f"Unexpected error in main loop: {e}")
+            logger.error("Unexpected error in main loop: %s", e)
             print(f"❌ Unexpected error: {e}")
         finally:
             print(f"\n📊 Total button presses: {self.press_count}")
@@ -210,7 +288,7 @@ def main():
         emulator = ButtonEmulator()
         emulator.run()
     except Exception as e:
-        logger.error(f"Fatal error: {e}")
+        logger.error("Fatal error: %s", e)
         print(f"💥 Fatal error: {e}")
         return 1
     
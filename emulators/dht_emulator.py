@@ -10,12 +10,14 @@ Temperature range: 20-35°C
 Humidity range: 30-80%
 """
 
-import json
-import random
+import os
+import threading
 import time
 import logging
-from typing import Dict, Any
+from collections import deque
+from typing import Optional
 import paho.mqtt.client as mqtt
+from mqtt_pool import MQTTPool
 
 # Configuration
 MQTT_BROKER = "broker.hivemq.com"
@@ -23,12 +25,24 @@ MQTT_PORT = 1883
 MQTT_TOPIC = "server_room/sensor/dht"
 PUBLISH_INTERVAL = 15  # seconds
 
+# Stress-test mode: set DHT_STRESS_INTERVAL (seconds, e.g. 0.01) to publish at that rate
+# from a ring of payloads pre-generated on a background thread; unset or 0 disables it
+STRESS_INTERVAL = float(os.environ.get("DHT_STRESS_INTERVAL") or 0)
+STRESS_RING_SIZE = 16
+
+PUBACK_TIMEOUT = 10.0  # seconds before an unacknowledged reading is reported
+
 # Sensor ranges
 TEMP_MIN = 20.0  # °C
 TEMP_MAX = 35.0  # °C
 HUMIDITY_MIN = 30.0  # %
 HUMIDITY_MAX = 80.0  # %
 
+# 64-bit LCG (Knuth's MMIX constants) used for reading variations
+_LCG_MULTIPLIER = 6364136223846793005
+_LCG_INCREMENT = 1442695040888963407
+_LCG_MASK = (1 << 64) - 1
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -50,48 +64,79 @@ class DHTEmulator:
         """
         self.broker = broker
         self.port = port
-        self.client = mqtt.Client()
         self.is_connected = False
+        self._connected_event = threading.Event()
         
-        # Set up MQTT callbacks
-        self.client.on_connect = self._on_connect
-        self.client.on_disconnect = self._on_disconnect
-        self.client.on_publish = self._on_publish
+        # Pre-serialized payloads, only filled by the producer thread in stress-test mode
+        self._ring = deque(maxlen=STRESS_RING_SIZE)
+        self._ring_space = threading.Event()
+        self._ring_ready = threading.Event()
+        self._stop_event = threading.Event()
+        self._producer: Optional[threading.Thread] = None
+        
+        # In-flight QoS 1 publishes as (MQTTMessageInfo, sent_at), checked without blocking
+        self._unacked = deque()
+        
+        # Private generator state, so emulators never contend on the shared random module
+        self._rng_state = int.from_bytes(os.urandom(8), 'little')
         
         # Initialize previous values for smooth transitions
-        self.last_temp = random.uniform(TEMP_MIN, TEMP_MAX)
-        self.last_humidity = random.uniform(HUMIDITY_MIN, HUMIDITY_MAX)
+        self.last_temp = TEMP_MIN + self._next_unit() * (TEMP_MAX - TEMP_MIN)
+        self.last_humidity = HUMIDITY_MIN + self._next_unit() * (HUMIDITY_MAX - HUMIDITY_MIN)
+        
+        # Shared MQTT client; connection events are delivered through the pool
+        self.client = MQTTPool.get(broker, port, self._on_connect, self._on_disconnect)
     
     def _on_connect(self, client, userdata, flags, rc):
         """Callback for when the client receives a CONNACK response from the server."""
         if rc == 0:
             self.is_connected = True
-            logger.info(f"Connected to MQTT broker at {self.broker}:{self.port}")
+            self._connected_event.set()
+            logger.info("Connected to MQTT broker at %s:%s", self.broker, self.port)
         else:
-            logger.error(f"Failed to connect to MQTT broker. Return code: {rc}")
+            logger.error("Failed to connect to MQTT broker. Return code: %s", rc)
     
     def _on_disconnect(self, client, userdata, rc):
         """Callback for when the client disconnects from the broker."""
         self.is_connected = False
+        self._connected_event.clear()
         if rc != 0:
             logger.warning("Unexpected disconnection from MQTT broker")
         else:
             logger.info("Disconnected from MQTT broker")
     
-    def _on_publish(self, client, userdata, mid):
-        """Callback for when a message is published."""
-        logger.debug(f"Message {mid} published successfully")
+    def _next_unit(self) -> float:
+        """
+        Advance the LCG and return a value in [0, 1].
+        
+        Returns:
+            The high 32 bits of the new state scaled to [0, 1]
+        """
+        self._rng_state = (self._rng_state * _LCG_MULTIPLIER + _LCG_INCREMENT) & _LCG_MASK
+        return (self._rng_state >> 32) / 0xFFFFFFFF
     
-    def _generate_sensor_data(self) -> Dict[str, float]:
+    def _next_delta(self, scale: float) -> float:
+        """
+        Draw a uniform variation in [-scale, scale].
+        
+        Args:
+            scale: Largest absolute variation
+            
+        Returns:
+            Random variation to apply to the previous reading
+        """
+        return (self._next_unit() - 0.5) * 2 * scale
+    
+    def _generate_sensor_data(self) -> bytes:
         """
         Generate realistic temperature and humidity readings.
         
         Returns:
-            Dictionary containing temperature and humidity values
+            JSON payload {"temp": .., "hum": ..} with values rounded to one decimal
         """
         # Generate values with some variation from previous readings for realism
-        temp_variation = random.uniform(-2.0, 2.0)
-        humidity_variation = random.uniform(-5.0, 5.0)
+        temp_variation = self._next_delta(2.0)
+        humidity_variation = self._next_delta(5.0)
         
         # Calculate new values
         new_temp = self.last_temp + temp_variation
@@ -105,10 +150,8 @@ class DHTEmulator:
         self.last_temp = new_temp
         self.last_humidity = new_humidity
         
-        return {
-            "temp": round(new_temp, 1),
-            "hum": round(new_humidity, 1)
-        }
+        # Fixed two-key schema, so format the JSON directly instead of going through json.dumps
+        return f'{{"temp":{new_temp:.1f},"hum":{new_humidity:.1f}}}'.encode('ascii')
     
     def connect(self) -> bool:
         """
@@ -118,30 +161,22 @@ class DHTEmulator:
             True if connection successful, False otherwise
         """
         try:
-            logger.info(f"Connecting to MQTT broker at {self.broker}:{self.port}...")
-            self.client.connect(self.broker, self.port)
-            self.client.loop_start()
-            
+            # The shared client connects (and reconnects) on its own network thread
             # Wait for connection to be established
             timeout = 10  # seconds
-            start_time = time.time()
-            while not self.is_connected and (time.time() - start_time) < timeout:
-                time.sleep(0.1)
-            
-            return self.is_connected
+            return self._connected_event.wait(timeout=timeout)
             
         except Exception as e:
-            logger.error(f"Error connecting to MQTT broker: {e}")
+            logger.error("Error connecting to MQTT broker: %s", e)
             return False
     
     def disconnect(self):
         """Disconnect from the MQTT broker."""
         try:
-            self.client.loop_stop()
-            self.client.disconnect()
+            MQTTPool.release(self.client, self._on_connect, self._on_disconnect)
             logger.info("Disconnected from MQTT broker")
         except Exception as e:
-            logger.error(f"Error disconnecting from MQTT broker: {e}")
+            logger.error("Error disconnecting from MQTT broker: %s", e)
     
     def publish_sensor_data(self) -> bool:
         """
@@ -156,39 +191,124 @@ class DHTEmulator:
                 if not self.connect():
                     return False
             
-            # Generate sensor data
-            sensor_data = self._generate_sensor_data()
-            
-            # Convert to JSON
-            json_payload = json.dumps(sensor_data)
+            # Take a pre-generated payload in stress-test mode, otherwise generate one now
+            if self._producer is not None:
+                json_payload = self._take_payload()
+                if json_payload is None:
+                    return False
+            else:
+                json_payload = self._generate_sensor_data()
             
             # Publish to MQTT topic
             result = self.client.publish(MQTT_TOPIC, json_payload, qos=1)
             
             if result.rc == mqtt.MQTT_ERR_SUCCESS:
-                logger.info(f"Published to {MQTT_TOPIC}: {json_payload}")
+                self._unacked.append((result, time.monotonic()))
+                self._collect_acks()
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("Published to %s: %s", MQTT_TOPIC, json_payload.decode('ascii'))
                 return True
             else:
-                logger.error(f"Failed to publish message. Return code: {result.rc}")
+                logger.error("Failed to publish message. Return code: %s", result.rc)
                 return False
                 
         except Exception as e:
-            logger.error(f"Error publishing sensor data: {e}")
+            logger.error("Error publishing sensor data: %s", e)
             return False
     
+    def _collect_acks(self):
+        """Drop acknowledged publishes and report the ones the broker never acknowledged."""
+        now = time.monotonic()
+        while self._unacked:
+            info, sent_at = self._unacked[0]
+            if info.is_published():
+                # Only checked at the next publish, so the elapsed time would just be the interval
+                logger.debug("Reading mid=%s acknowledged", info.mid)
+            elif now - sent_at > PUBACK_TIMEOUT:
+                logger.warning("Reading mid=%s not acknowledged within %ss", info.mid, PUBACK_TIMEOUT)
+            else:
+                break
+            self._unacked.popleft()
+    
+    def _take_payload(self) -> Optional[bytes]:
+        """
+        Wait for the producer's next payload.
+        
+        The producer thread is the only one advancing the generator state in stress-test
+        mode, so an empty ring is waited on rather than filled by generating here.
+        
+        Returns:
+            The oldest pre-generated payload, or None if the producer was stopped
+        """
+        while not self._ring:
+            if self._stop_event.is_set():
+                return None
+            self._ring_ready.clear()
+            if not self._ring:
+                self._ring_ready.wait()
+        json_payload = self._ring.popleft()
+        self._ring_space.set()
+        return json_payload
+    
+    def _produce(self):
+        """Keep the payload ring full until the emulator stops."""
+        while not self._stop_event.is_set():
+            if len(self._ring) < STRESS_RING_SIZE:
+                self._ring.append(self._generate_sensor_data())
+                self._ring_ready.set()
+                continue
+            self._ring_space.clear()
+            if len(self._ring) >= STRESS_RING_SIZE:
+                self._ring_space.wait()
+    
+    def _start_producer(self):
+        """Start generating payloads ahead of the publish loop."""
+        self._producer = threading.Thread(target=self._produce, daemon=True)
+        self._producer.start()
+    
+    def _stop_producer(self):
+        """Stop the payload producer thread, if running."""
+        if self._producer is None:
+            return
+        self._stop_event.set()
+        self._ring_space.set()
+        self._ring_ready.set()
+        self._producer.join(timeout=1.0)
+        self._producer = None
+    
+    def start_publishing(self) -> float:
+        """
+        Prepare for the publish loop, starting the payload producer in stress-test mode.
+        
+        Returns:
+            Seconds to wait between publishes
+        """
+        if STRESS_INTERVAL <= 0:
+            return PUBLISH_INTERVAL
+        logger.info("Stress-test mode: publishing every %s seconds from a %s-payload ring",
+                    STRESS_INTERVAL, STRESS_RING_SIZE)
+        self._start_producer()
+        return STRESS_INTERVAL
+    
+    def stop_publishing(self):
+        """End the publish loop started by start_publishing(), stopping the payload producer."""
+        self._stop_producer()
+    
     def run(self):
         """Run the DHT emulator continuously."""
         logger.info("Starting DHT22 Sensor Emulator...")
-        logger.info(f"Temperature range: {TEMP_MIN}°C - {TEMP_MAX}°C")
-        logger.info(f"Humidity range: {HUMIDITY_MIN}% - {HUMIDITY_MAX}%")
-        logger.info(f"Publishing interval: {PUBLISH_INTERVAL} seconds (15 sec for realistic server room monitoring)")
-        logger.info(f"MQTT Topic: {MQTT_TOPIC}")
+        logger.info("Temperature range: %s°C - %s°C", TEMP_MIN, TEMP_MAX)
+        logger.info("Humidity range: %s%% - %s%%", HUMIDITY_MIN, HUMIDITY_MAX)
+        logger.info("Publishing interval: %s seconds (15 sec for realistic server room monitoring)", PUBLISH_INTERVAL)
+        logger.info("MQTT Topic: %s", MQTT_TOPIC)
         
         # Connect to MQTT broker
         if not self.connect():
             logger.error("Failed to connect to MQTT broker. Exiting.")
             return
         
+        interval = self.start_publishing()
+        
         try:
             while True:
                 # Publish sensor data
@@ -198,13 +318,14 @@ class DHTEmulator:
                     logger.warning("Failed to publish sensor data. Retrying in next cycle...")
                 
                 # Wait for next publish interval
-                time.sleep(PUBLISH_INTERVAL)
+                time.sleep(interval)
                 
         except KeyboardInterrupt:
             logger.info("Received interrupt signal. Shutting down...")
         except Exception as e:
-            logger.error(f"Unexpected error in main loop: {e}")
+            logger.error("Unexpected error in main loop: %s", e)
         finally:
+            self.stop_publishing()
             self.disconnect()
 
 
@@ -214,7 +335,7 @@ def main():
         emulator = DHTEmulator()
         emulator.run()
     except Exception as e:
-        logger.error(f"Fatal error: {e}")
+        logger.error("Fatal error: %s", e)
         return 1
     
     return 0
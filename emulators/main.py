@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Combined Emulator Runner for Server Room Cooling Monitor
+
+This script runs the DHT sensor, relay and button emulators together in a single
+process instead of three separate ones. All three are driven from one asyncio
+event loop with asyncio.gather() and share MQTTPool's connections and network thread,
+so there is one interpreter start-up and one paho import for the whole test rig.
+
+The button is still operated from this terminal: press Enter to publish a press,
+type 'quit' (or press Ctrl+C) to stop all three emulators.
+"""
+
+import asyncio
+import logging
+from button_emulator import ButtonEmulator, MQTT_BROKER, MQTT_PORT
+from dht_emulator import DHTEmulator
+from relay_emulator import RelayEmulator
+
+logger = logging.getLogger(__name__)
+
+
+async def run_button(button: ButtonEmulator, stop: asyncio.Event):
+    """
+    Run the interactive button emulator, stopping the others when it exits.
+
+    Args:
+        button: Button emulator to drive
+        stop: Set when the user quits so the other tasks finish too
+    """
+    try:
+        await button.run_async()
+    finally:
+        stop.set()
+
+
+async def run_dht(dht: DHTEmulator, stop: asyncio.Event):
+    """
+    Publish DHT readings on the event loop until stopped.
+
+    Args:
+        dht: DHT emulator to drive
+        stop: Ends the publish loop when set
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        if not await loop.run_in_executor(None, dht.connect):
+            logger.error("DHT emulator failed to connect to MQTT broker")
+            return
+
+        interval = dht.start_publishing()
+        while not stop.is_set():
+            # publish_sensor_data() may block reconnecting, so keep it off the loop
+            await loop.run_in_executor(None, dht.publish_sensor_data)
+            try:
+                await asyncio.wait_for(stop.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        dht.stop_publishing()
+        dht.disconnect()
+
+
+async def run_relay(relay: RelayEmulator, stop: asyncio.Event):
+    """
+    Keep the relay emulator subscribed until stopped.
+
+    Relay commands are handled on paho's network thread, so this task only has to
+    wait for the subscription and then for shutdown.
+
+    Args:
+        relay: Relay emulator to drive
+        stop: Releases the relay's connection when set
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        if not await loop.run_in_executor(None, relay.connect):
+            logger.error("Relay emulator failed to subscribe on MQTT broker")
+            return
+
+        relay.display_status()
+        await stop.wait()
+    finally:
+        print(f"\n📊 Relay commands processed: {relay.command_count} (fan {relay.fan_status})")
+        relay.disconnect()
+
+
+async def run_all(broker: str = MQTT_BROKER, port: int = MQTT_PORT):
+    """
+    Run all three emulators concurrently against one broker.
+
+    Args:
+        broker: MQTT broker hostname/IP
+        port: MQTT broker port
+    """
+    stop = asyncio.Event()
+    button = ButtonEmulator(broker, port)
+    dht = DHTEmulator(broker, port)
+    relay = RelayEmulator(broker, port)
+
+    # gather() rather than TaskGroup (3.11+) and run_in_executor() rather than
+    # to_thread() (3.9+) keep this runnable on the documented Python 3.7
+    tasks = [
+        asyncio.ensure_future(run_relay(relay, stop)),
+        asyncio.ensure_future(run_dht(dht, stop)),
+        asyncio.ensure_future(run_button(button, stop)),
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        # Like a TaskGroup, don't leave the others running if one of them failed
+        for task in tasks:
+            task.cancel()
+
+
+def main():
+    """Main entry point for the combined emulators."""
+    try:
+        asyncio.run(run_all())
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        logger.error("Fatal error: %s", e)
+        print(f"💥 Fatal error: {e}")
+        return 1
+
+    print("✅ All emulators stopped.")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
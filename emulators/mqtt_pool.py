@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Shared MQTT Connection Pool for the Server Room Emulators
+
+This module keeps one long-lived paho MQTT client per (broker, port) pair so
+that emulators running in the same process share a single TCP connection and
+network thread instead of each opening their own. Emulators that need a
+persistent broker session ask for their own client_id and get a separate
+client for it.
+
+Clients are reference counted: the first MQTTPool.get() for a broker connects
+and starts the network loop, later calls reuse the same client, and the
+connection is closed when the last user calls MQTTPool.release().
+
+Because the client is shared, emulators must not install their own
+on_connect/on_disconnect/on_message handlers. Connection listeners are passed
+to get() and topic handlers are registered with MQTTPool.subscribe(), which
+uses paho's per-topic message_callback_add() dispatch.
+
+Setting SRCM_MQTT_V5=1 makes the pool speak MQTT 5.0: connections advertise a
+receive maximum so the broker cannot flood paho's single callback thread, and
+subscriptions may join a shared subscription group so several emulator
+instances split a topic's messages instead of each handling all of them.
+"""
+
+import os
+import socket
+import threading
+import logging
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import paho.mqtt.client as mqtt
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+
+logger = logging.getLogger(__name__)
+
+# Backoff for paho's automatic reconnects (seconds)
+RECONNECT_DELAY_MIN = 1
+RECONNECT_DELAY_MAX = 30
+
+# MQTT 5.0 is opt-in; the default stays 3.1.1 for brokers that do not support it
+MQTT_V5 = os.environ.get("SRCM_MQTT_V5", "") not in ("", "0")
+RECEIVE_MAXIMUM = 20  # in-flight QoS 1/2 messages the broker may send us at once
+SESSION_EXPIRY = 3600  # seconds a persistent v5 session outlives its connection
+
+ConnectListener = Callable[[mqtt.Client, object, dict, int], None]
+DisconnectListener = Callable[[mqtt.Client, object, int], None]
+MessageCallback = Callable[[mqtt.Client, object, mqtt.MQTTMessage], None]
+SubscribedCallback = Callable[[str], None]
+
+
+def _reason_code(rc) -> int:
+    """Return a paho result as a plain int, whether it is an int or an MQTT 5.0 ReasonCodes."""
+    return rc if isinstance(rc, int) else rc.value
+
+
+class _PoolEntry:
+    """Book-keeping for one shared client."""
+
+    def __init__(self, client: mqtt.Client):
+        self.client = client
+        self.refcount = 0
+        self.connected = False
+        self.connect_listeners: List[ConnectListener] = []
+        self.disconnect_listeners: List[DisconnectListener] = []
+        self.subscriptions: Dict[str, Tuple[int, Optional[SubscribedCallback]]] = {}  # topic -> (qos, on_subscribed)
+        self.pending_subacks: Dict[int, Tuple[str, SubscribedCallback]] = {}  # mid -> (topic, on_subscribed)
+        self.early_subacks: Set[int] = set()  # SUBACKs that beat their mid being recorded
+
+
+class MQTTPool:
+    """Process-wide registry of shared, reference-counted MQTT clients."""
+
+    _lock = threading.Lock()
+    _entries: Dict[Tuple[str, int, str], _PoolEntry] = {}
+
+    @classmethod
+    def get(cls, broker: str, port: int,
+            on_connect: ConnectListener = None,
+            on_disconnect: DisconnectListener = None,
+            client_id: str = "",
+            clean_session: bool = True) -> mqtt.Client:
+        """
+        Get the shared client for a broker, connecting it on first use.
+
+        Args:
+            broker: MQTT broker hostname/IP
+            port: MQTT broker port
+            on_connect: Called with paho's on_connect arguments on every CONNACK
+            on_disconnect: Called with paho's on_disconnect arguments on every disconnect
+            client_id: Stable client id; empty lets the broker assign one
+            clean_session: False keeps subscriptions and queued QoS 1 messages on the
+                broker across reconnects (requires a client_id)
+
+        Returns:
+            The shared paho client for (broker, port, client_id)
+        """
+        key = (broker, port, client_id)
+        with cls._lock:
+            entry = cls._entries.get(key)
+            if entry is None:
+                entry = cls._create(broker, port, client_id, clean_session)
+                cls._entries[key] = entry
+            entry.refcount += 1
+            if on_connect is not None:
+                entry.connect_listeners.append(on_connect)
+            if on_disconnect is not None:
+                entry.disconnect_listeners.append(on_disconnect)
+            already_connected = entry.connected
+
+        # Late joiners still need to learn that the connection is up
+        if already_connected and on_connect is not None:
+            on_connect(entry.client, None, {}, 0)
+        return entry.client
+
+    @classmethod
+    def subscribe(cls, client: mqtt.Client, topic: str, callback: MessageCallback, qos: int = 1,
+                  on_subscribed: SubscribedCallback = None, share_group: str = None):
+        """
+        Route messages for a topic on a shared client to a callback.
+
+        The subscription is remembered and re-issued after every reconnect.
+
+        Args:
+            client: Client returned by get()
+            topic: Topic filter to subscribe to
+            callback: Called with paho's on_message arguments for matching messages
+            qos: Subscription QoS
+            on_subscribed: Called with the topic filter each time the broker acknowledges the subscription
+            share_group: Join this MQTT 5.0 shared subscription group; ignored under 3.1.1
+        """
+        # Shared-subscription messages arrive on the plain topic, so route on that
+        client.message_callback_add(topic, callback)
+        if share_group and MQTT_V5:
+            topic = f"$share/{share_group}/{topic}"
+        with cls._lock:
+            entry = cls._entry_for(client)
+            entry.subscriptions[topic] = (qos, on_subscribed)
+            connected = entry.connected
+        if connected:
+            cls._subscribe(entry, topic, qos, on_subscribed)
+
+    @classmethod
+    def release(cls, client: mqtt.Client,
+                on_connect: ConnectListener = None,
+                on_disconnect: DisconnectListener = None):
+        """
+        Drop one reference to a shared client, disconnecting it when unused.
+
+        Args:
+            client: Client returned by get()
+            on_connect: Listener passed to get(), to unregister
+            on_disconnect: Listener passed to get(), to unregister
+        """
+        with cls._lock:
+            key, entry = next(((k, e) for k, e in cls._entries.items() if e.client is client), (None, None))
+            if entry is None:
+                return
+            if on_connect in entry.connect_listeners:
+                entry.connect_listeners.remove(on_connect)
+            if on_disconnect in entry.disconnect_listeners:
+                entry.disconnect_listeners.remove(on_disconnect)
+            entry.refcount -= 1
+            if entry.refcount > 0:
+                return
+            del cls._entries[key]
+
+        client.disconnect()
+        client.loop_stop()
+        logger.info("Closed shared MQTT connection to %s:%s", key[0], key[1])
+
+    @classmethod
+    def _create(cls, broker: str, port: int, client_id: str, clean_session: bool) -> _PoolEntry:
+        """Create, connect and start a new shared client. Caller must hold the lock."""
+        if MQTT_V5:
+            client = mqtt.Client(client_id=client_id, protocol=mqtt.MQTTv5)
+        else:
+            client = mqtt.Client(client_id=client_id, clean_session=clean_session)
+        entry = _PoolEntry(client)
+        # v5 callbacks take an extra properties argument and report ReasonCodes instead of ints
+        client.on_connect = lambda c, userdata, flags, rc, *_: cls._dispatch_connect(
+            entry, userdata, flags, _reason_code(rc))
+        client.on_disconnect = lambda c, userdata, rc, *_: cls._dispatch_disconnect(
+            entry, userdata, _reason_code(rc))
+        client.on_subscribe = lambda c, userdata, mid, *_: cls._dispatch_suback(entry, mid)
+        client.on_socket_open = lambda c, userdata, sock: cls._tune_socket(sock)
+        client.reconnect_delay_set(min_delay=RECONNECT_DELAY_MIN, max_delay=RECONNECT_DELAY_MAX)
+
+        logger.info("Connecting to MQTT broker at %s:%s...", broker, port)
+        if MQTT_V5:
+            properties = Properties(PacketTypes.CONNECT)
+            properties.ReceiveMaximum = RECEIVE_MAXIMUM
+            if not clean_session:
+                properties.SessionExpiryInterval = SESSION_EXPIRY
+            client.connect_async(broker, port, clean_start=clean_session, properties=properties)
+        else:
+            client.connect_async(broker, port)
+        client.loop_start()
+        return entry
+
+    @staticmethod
+    def _tune_socket(sock):
+        """Send small MQTT packets immediately instead of letting Nagle hold them back."""
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            # Linux only, and the kernel may drop back to delayed ACKs later; best effort
+            if hasattr(socket, "TCP_QUICKACK"):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+        except (OSError, AttributeError) as e:
+            logger.debug("Could not tune MQTT socket options: %s", e)
+
+    @classmethod
+    def _entry_for(cls, client: mqtt.Client) -> _PoolEntry:
+        """Find the pool entry owning a client. Caller must hold the lock."""
+        for entry in cls._entries.values():
+            if entry.client is client:
+                return entry
+        raise KeyError("Client is not managed by MQTTPool")
+
+    @classmethod
+    def _subscribe(cls, entry: _PoolEntry, topic: str, qos: int, on_subscribed: Optional[SubscribedCallback]):
+        """Issue a SUBSCRIBE, log the outcome and arrange for on_subscribed to run on SUBACK."""
+        result, mid = entry.client.subscribe(topic, qos=qos)
+        if result != mqtt.MQTT_ERR_SUCCESS:
+            logger.error("Failed to subscribe to topic: %s", topic)
+            return
+        logger.info("Subscribed to topic: %s", topic)
+        if on_subscribed is None:
+            return
+
+        with cls._lock:
+            acked = mid in entry.early_subacks
+            if acked:
+                entry.early_subacks.discard(mid)
+            else:
+                entry.pending_subacks[mid] = (topic, on_subscribed)
+        if acked:
+            on_subscribed(topic)
+
+    @classmethod
+    def _dispatch_suback(cls, entry: _PoolEntry, mid: int):
+        """Run the on_subscribed callback waiting on a SUBACK."""
+        with cls._lock:
+            pending = entry.pending_subacks.pop(mid, None)
+            if pending is None:
+                entry.early_subacks.add(mid)
+                return
+        topic, on_subscribed = pending
+        on_subscribed(topic)
+
+    @classmethod
+    def _dispatch_connect(cls, entry: _PoolEntry, userdata, flags, rc):
+        """Fan a CONNACK out to every listener, restoring subscriptions first if the broker lost them."""
+        with cls._lock:
+            entry.connected = rc == 0
+            listeners = list(entry.connect_listeners)
+            subscriptions = list(entry.subscriptions.items())
+            entry.pending_subacks.clear()
+            entry.early_subacks.clear()
+
+        if rc == 0:
+            # A resumed session still holds every subscription, so skip the SUBSCRIBE round trips
+            session_present = flags.get('session present', 0)
+            for topic, (qos, on_subscribed) in subscriptions:
+                if not session_present:
+                    cls._subscribe(entry, topic, qos, on_subscribed)
+                elif on_subscribed is not None:
+                    on_subscribed(topic)
+        for listener in listeners:
+            # One failing listener must not keep the CONNACK from the others
+            try:
+                listener(entry.client, userdata, flags, rc)
+            except Exception as e:
+                logger.error("Error in connect listener %r: %s", listener, e)
+
+    @classmethod
+    def _dispatch_disconnect(cls, entry: _PoolEntry, userdata, rc):
+        """Fan a disconnect out to every listener."""
+        with cls._lock:
+            entry.connected = False
+            listeners = list(entry.disconnect_listeners)
+
+        for listener in listeners:
+            try:
+                listener(entry.client, userdata, rc)
+            except Exception as e:
+                logger.error("Error in disconnect listener %r: %s", listener, e)
@@ -10,15 +10,34 @@ The relay emulator simulates the physical cooling fan that would be controlled
 by the server room monitoring system based on temperature readings and hysteresis logic.
 """
 
+import os
+import signal
+import socket
+import sys
+import threading
 import time
 import logging
 from typing import Optional
-import paho.mqtt.client as mqtt
+from mqtt_pool import MQTTPool
 
 # Configuration
 MQTT_BROKER = "broker.hivemq.com"
 MQTT_PORT = 1883
 MQTT_TOPIC = "server_room/control/relay"
+# Stable per-host id so the broker keeps our session; set SRCM_RELAY_CLIENT_ID
+# to give each emulator its own when running several in a shared group
+MQTT_CLIENT_ID = os.environ.get("SRCM_RELAY_CLIENT_ID") or f"srcm-relay-{socket.gethostname()}"
+MQTT_SHARE_GROUP = "relays"  # MQTT 5.0 only: relay emulators split commands instead of all handling them
+
+# Relay command handling
+_CMD_ON = sys.intern("ON")
+_CMD_OFF = sys.intern("OFF")
+_VALID_COMMANDS = frozenset({_CMD_ON, _CMD_OFF})
+_FAN_BANNER = {_CMD_ON: "🌀 Relay: Fan ON", _CMD_OFF: "⏹️  Relay: Fan OFF"}
+_STATUS_ICON = {_CMD_ON: "🟢", _CMD_OFF: "🔴"}
+_RULE = "-" * 40
+# Status footer shown after each command, formatted once per fan state
+_STATUS_LINE = {cmd: f"   {icon} Current Status: Fan {cmd}\n{_RULE}\n" for cmd, icon in _STATUS_ICON.items()}
 
 # Setup logging
 logging.basicConfig(
@@ -28,9 +47,26 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# Formatted local time, refreshed only when the second changes
+_ts_cache = [0, ""]
+
+
+def _ts() -> str:
+    """Return the current local time as 'YYYY-MM-DD HH:MM:SS', cached per second."""
+    now = int(time.time())
+    if now != _ts_cache[0]:
+        _ts_cache[0] = now
+        _ts_cache[1] = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now))
+    return _ts_cache[1]
+
+
 class RelayEmulator:
     """Emulates a relay-controlled cooling fan that responds to MQTT commands."""
     
+    # Fixed attribute layout; slot access is cheaper than an instance dict on the message path
+    __slots__ = ("broker", "port", "is_connected", "_subscribed_event", "fan_status",
+                 "command_count", "_stop_event", "client")
+    
     def __init__(self, broker: str = MQTT_BROKER, port: int = MQTT_PORT):
         """
         Initialize the relay emulator.
@@ -41,85 +77,58 @@ class RelayEmulator:
         """
         self.broker = broker
         self.port = port
-        self.client = mqtt.Client()
         self.is_connected = False
-        self.fan_status = "OFF"  # Track current fan status
+        self._subscribed_event = threading.Event()  # set once SUBACK arrives for MQTT_TOPIC
+        self.fan_status = _CMD_OFF  # Track current fan status
         self.command_count = 0
+        self._stop_event = threading.Event()
         
-        # Duplicate message filtering
-        self.last_message = None
-        self.last_message_time = 0
-        
-        # Set up MQTT callbacks
-        self.client.on_connect = self._on_connect
-        self.client.on_disconnect = self._on_disconnect
-        self.client.on_message = self._on_message
-        self.client.on_subscribe = self._on_subscribe
+        # Persistent-session MQTT client; only relay control messages are routed to this emulator
+        self.client = MQTTPool.get(broker, port, self._on_connect, self._on_disconnect,
+                                   client_id=MQTT_CLIENT_ID, clean_session=False)
+        MQTTPool.subscribe(self.client, MQTT_TOPIC, self._on_relay_message, qos=1,
+                           on_subscribed=self._on_subscribed, share_group=MQTT_SHARE_GROUP)
     
     def _on_connect(self, client, userdata, flags, rc):
         """Callback for when the client receives a CONNACK response from the server."""
         if rc == 0:
             self.is_connected = True
-            logger.info(f"Connected to MQTT broker at {self.broker}:{self.port}")
-            
-            # Subscribe to the relay control topic
-            result = client.subscribe(MQTT_TOPIC, qos=1)
-            if result[0] == mqtt.MQTT_ERR_SUCCESS:
-                logger.info(f"Subscribed to topic: {MQTT_TOPIC}")
-            else:
-                logger.error(f"Failed to subscribe to topic: {MQTT_TOPIC}")
+            logger.info("Connected to MQTT broker at %s:%s", self.broker, self.port)
         else:
-            logger.error(f"Failed to connect to MQTT broker. Return code: {rc}")
+            logger.error("Failed to connect to MQTT broker. Return code: %s", rc)
     
     def _on_disconnect(self, client, userdata, rc):
         """Callback for when the client disconnects from the broker."""
         self.is_connected = False
+        self._subscribed_event.clear()
         if rc != 0:
             logger.warning("Unexpected disconnection from MQTT broker")
+            print("\n⚠️  Connection lost. paho will reconnect automatically...")
         else:
             logger.info("Disconnected from MQTT broker")
     
-    def _on_subscribe(self, client, userdata, mid, granted_qos):
-        """Callback for when the client receives a SUBACK response from the server."""
-        logger.debug(f"Subscription confirmed with message ID: {mid}, QoS: {granted_qos}")
+    def _on_subscribed(self, topic: str):
+        """Called when the broker confirms the relay control subscription."""
+        logger.debug("Subscription confirmed for topic: %s", topic)
+        self._subscribed_event.set()
     
-    def _on_message(self, client, userdata, msg):
+    def _on_relay_message(self, client, userdata, msg):
         """
-        Callback for when a message is received from the broker.
+        Callback for messages on the relay control topic.
+        
+        paho routes only MQTT_TOPIC here (via message_callback_add), so no topic
+        check is needed; _handle_relay_command does its own error handling.
         
         Args:
             client: The client instance
             userdata: User data
             msg: The message instance
         """
-        try:
-            # Decode the message
-            topic = msg.topic
-            payload = msg.payload.decode('utf-8').strip().upper()
-            
-            logger.info(f"Received message on topic '{topic}': {payload}")
-
-            # Check for duplicate message (add these lines) TODO remove this
-            import time
-            current_time = time.time()
-            if (self.last_message == payload and 
-                current_time - self.last_message_time < 1.0):  # 1 second window
-                logger.debug(f"Duplicate message filtered: {payload}")
-                return  # Skip processing duplicate
-                
-            # Update last message tracking
-            self.last_message = payload
-            self.last_message_time = current_time
-
-            
-            # Process relay commands
-            if topic == MQTT_TOPIC:
-                self._handle_relay_command(payload)
-            else:
-                logger.warning(f"Received message on unexpected topic: {topic}")
-                
-        except Exception as e:
-            logger.error(f"Error processing received message: {e}")
+        # Interned so comparisons against _CMD_ON/_CMD_OFF and fan_status hit the identity fast path
+        command = sys.intern(msg.payload.decode('ascii', 'ignore').strip().upper())
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Received message on topic '%s': %s", msg.topic, command)
+        self._handle_relay_command(command)
     
     def _handle_relay_command(self, command: str):
         """
@@ -130,45 +139,45 @@ class RelayEmulator:
         """
         try:
             self.command_count += 1
-            timestamp = time.strftime('%Y-%m-%d %H:%M:%S')
+            timestamp = _ts()
             
-            if command == "ON":
-                if self.fan_status != "ON":
-                    self.fan_status = "ON"
-                    print(f"\n🌀 Relay: Fan ON")
-                    print(f"   ⏰ Time: {timestamp}")
-                    print(f"   📊 Command #{self.command_count}")
-                    logger.info("Cooling fan turned ON")
-                else:
-                    print(f"\n🔄 Relay: Fan already ON (no change)")
-                    print(f"   ⏰ Time: {timestamp}")
-                    logger.info("Fan was already ON")
-                    
-            elif command == "OFF":
-                if self.fan_status != "OFF":
-                    self.fan_status = "OFF"
-                    print(f"\n⏹️  Relay: Fan OFF")
-                    print(f"   ⏰ Time: {timestamp}")
-                    print(f"   📊 Command #{self.command_count}")
-                    logger.info("Cooling fan turned OFF")
-                else:
-                    print(f"\n🔄 Relay: Fan already OFF (no change)")
-                    print(f"   ⏰ Time: {timestamp}")
-                    logger.info("Fan was already OFF")
-                    
-            else:
-                print(f"\n❌ Unknown relay command: '{command}'")
-                print(f"   ⏰ Time: {timestamp}")
-                print(f"   ℹ️  Expected: 'ON' or 'OFF'")
-                logger.warning(f"Received unknown relay command: {command}")
+            if command not in _VALID_COMMANDS:
+                return self._log_unknown(command, timestamp)
+            if command == self.fan_status:
+                return self._log_noop(command, timestamp)
             
-            # Show current status
-            status_icon = "🟢" if self.fan_status == "ON" else "🔴"
-            print(f"   {status_icon} Current Status: Fan {self.fan_status}")
-            print("-" * 40)
+            self.fan_status = command
+            sys.stdout.write(
+                f"\n{_FAN_BANNER[command]}\n"
+                f"   ⏰ Time: {timestamp}\n"
+                f"   📊 Command #{self.command_count}\n"
+                f"{_STATUS_LINE[self.fan_status]}"
+            )
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Cooling fan turned %s", command)
             
         except Exception as e:
-            logger.error(f"Error handling relay command '{command}': {e}")
+            logger.error("Error handling relay command '%s': %s", command, e)
+    
+    def _log_noop(self, command: str, timestamp: str):
+        """Report a command that matches the current fan status."""
+        sys.stdout.write(
+            f"\n🔄 Relay: Fan already {command} (no change)\n"
+            f"   ⏰ Time: {timestamp}\n"
+            f"{_STATUS_LINE[self.fan_status]}"
+        )
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Fan was already %s", command)
+    
+    def _log_unknown(self, command: str, timestamp: str):
+        """Report a command that is neither ON nor OFF."""
+        sys.stdout.write(
+            f"\n❌ Unknown relay command: '{command}'\n"
+            f"   ⏰ Time: {timestamp}\n"
+            f"   ℹ️  Expected: 'ON' or 'OFF'\n"
+            f"{_STATUS_LINE[self.fan_status]}"
+        )
+        logger.warning("Received unknown relay command: %s", command)
     
     def connect(self) -> bool:
         """
@@ -178,35 +187,27 @@ class RelayEmulator:
             True if connection successful, False otherwise
         """
         try:
-            logger.info(f"Connecting to MQTT broker at {self.broker}:{self.port}...")
-            self.client.connect(self.broker, self.port)
-            self.client.loop_start()
-            
-            # Wait for connection to be established
+            # The shared client connects (and reconnects) on its own network thread
+            # Wait until the relay control subscription is active
             timeout = 10  # seconds
-            start_time = time.time()
-            while not self.is_connected and (time.time() - start_time) < timeout:
-                time.sleep(0.1)
-            
-            return self.is_connected
+            return self._subscribed_event.wait(timeout=timeout)
             
         except Exception as e:
-            logger.error(f"Error connecting to MQTT broker: {e}")
+            logger.error("Error connecting to MQTT broker: %s", e)
             return False
     
     def disconnect(self):
         """Disconnect from the MQTT broker."""
         try:
-            self.client.loop_stop()
-            self.client.disconnect()
+            MQTTPool.release(self.client, self._on_connect, self._on_disconnect)
             logger.info("Disconnected from MQTT broker")
         except Exception as e:
-            logger.error(f"Error disconnecting from MQTT broker: {e}")
+            logger.error("Error disconnecting from MQTT broker: %s", e)
     
     def display_status(self):
         """Display the current relay and connection status."""
         connection_icon = "🟢" if self.is_connected else "🔴"
-        fan_icon = "🟢" if self.fan_status == "ON" else "🔴"
+        fan_icon = _STATUS_ICON[self.fan_status]
         
         print("\n" + "="*50)
         print("⚡ RELAY EMULATOR STATUS")
@@ -247,34 +248,31 @@ class RelayEmulator:
         self.display_instructions()
         self.display_status()
         
+        # Ctrl+C just wakes the main thread; signal handlers can only be set from it
+        previous_handler = None
+        if threading.current_thread() is threading.main_thread():
+            previous_handler = signal.signal(signal.SIGINT, lambda *_: self._stop_event.set())
+        
         try:
-            # Keep the script running to listen for messages
-            while True:
-                if not self.is_connected:
-                    logger.warning("Connection lost. Attempting to reconnect...")
-                    print("\n⚠️  Connection lost. Reconnecting...")
-                    if self.connect():
-                        print("✅ Reconnected successfully!")
-                        self.display_status()
-                    else:
-                        print("❌ Reconnection failed. Retrying in 5 seconds...")
-                        time.sleep(5)
-                        continue
-                
-                # Sleep briefly to prevent high CPU usage
-                time.sleep(0.1)
-                
-        except KeyboardInterrupt:
+            # Messages and reconnects are handled on paho's network thread; park until stopped
+            self._stop_event.wait()
             print("\n\n👋 Received interrupt signal. Shutting down...")
+                
         except Exception as e:
-            logger.error(f"Unexpected error in main loop: {e}")
+            logger.error("Unexpected error in main loop: %s", e)
             print(f"❌ Unexpected error: {e}")
         finally:
             print(f"\n📊 Final Statistics:")
             print(f"   • Total commands processed: {self.command_count}")
             print(f"   • Final fan status: {self.fan_status}")
+            if previous_handler is not None:
+                signal.signal(signal.SIGINT, previous_handler)
             self.disconnect()
             print("✅ Relay emulator stopped.")
+    
+    def stop(self):
+        """Ask a running run() call to shut down."""
+        self._stop_event.set()
 
 
 def main():
@@ -283,7 +281,7 @@ def main():
         emulator = RelayEmulator()
         emulator.run()
     except Exception as e:
-        logger.error(f"Fatal error: {e}")
+        logger.error("Fatal error: %s", e)
         print(f"💥 Fatal error: {e}")
         return 1
     
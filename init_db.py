@@ -10,206 +10,474 @@ Tables created:
 - sensor_data: Stores temperature and humidity readings with timestamps
 - alarms: Stores system alarm messages and events with timestamps
 
-Usage: python3 init_db.py
+Usage: python3 init_db.py [--status | --no-status]
+
+The database statistics report runs by default only when stdout is a terminal;
+--no-status skips it (e.g. in container entrypoints), --status forces it.
 """
 
+import argparse
+import atexit
+import contextlib
+import itertools
 import sqlite3
 import os
+import sys
+import threading
 from datetime import datetime
 
 # Database configuration
 DATABASE_FILE = "server_room.db"
+PAGE_SIZE = 8192  # bytes; more small sensor rows per page and shallower index B-trees
+CACHE_SIZE_KB = 64000  # page cache per connection, in KiB
+VACUUM_PAGES = 1000  # free pages returned to the OS per compact_database() call
+BUSY_TIMEOUT_MS = 5000  # wait this long for another writer before failing with "database is locked"
+STATEMENT_CACHE_SIZE = 256  # prepared statements kept per connection
+MMAP_SIZE = 268435456  # 256 MiB of the file read through mmap() instead of read()
+BULK_CHUNK_SIZE = 500  # rows per transaction in bulk_insert_readings()/bulk_insert_alarms()
+
+_SQL_INSERT_READING = "INSERT INTO sensor_data (temperature, humidity) VALUES (?, ?)"
+_SQL_INSERT_ALARM = "INSERT INTO alarms (message) VALUES (?)"
+
+# Status queries; module constants so the same string hits sqlite3's statement cache every call
+# Row counts come from the rowid range: two B-tree seeks (one per subquery) instead of a
+# full scan. This assumes rows are never deleted: nothing in the system deletes them, so
+# the ids have no holes. Go back to COUNT(*) before adding any purge or delete
+_SQL_COUNT_SENSOR = "SELECT COALESCE((SELECT MAX(id) FROM sensor_data) - (SELECT MIN(id) FROM sensor_data) + 1, 0)"
+_SQL_COUNT_ALARM = "SELECT COALESCE((SELECT MAX(id) FROM alarms) - (SELECT MIN(id) FROM alarms) + 1, 0)"
+_SQL_LATEST_SENSOR = "SELECT timestamp, temperature, humidity FROM sensor_data ORDER BY timestamp DESC LIMIT 1"
+_SQL_LATEST_ALARM = "SELECT timestamp, message FROM alarms ORDER BY timestamp DESC LIMIT 1"
+
+# STRICT tables (SQLite 3.37+) reject values of the wrong type instead of silently storing them
+_TABLE_OPTIONS = " STRICT" if sqlite3.sqlite_version_info >= (3, 37) else ""
+
+# Schema, applied atomically by create_database()
+SCHEMA_SQL = f'''
+    -- IMMEDIATE takes the write lock up front, where busy_timeout applies; a deferred
+    -- transaction upgrading to write behind a concurrent writer fails at once instead
+    BEGIN IMMEDIATE;
+    
+    -- Timestamps are Unix epoch seconds (strftime rather than unixepoch() for SQLite < 3.38).
+    -- id is a plain rowid alias: no sqlite_sequence update per INSERT, but the id of the
+    -- newest row can be handed out again after that row is deleted
+    CREATE TABLE IF NOT EXISTS sensor_data (
+        id INTEGER PRIMARY KEY,
+        timestamp INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+        temperature REAL NOT NULL,
+        humidity REAL NOT NULL
+    ){_TABLE_OPTIONS};
+    
+    CREATE TABLE IF NOT EXISTS alarms (
+        id INTEGER PRIMARY KEY,
+        timestamp INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+        message TEXT NOT NULL
+    ){_TABLE_OPTIONS};
+    
+    -- Covering indexes: "latest row" queries and timestamp range scans are answered
+    -- from the index alone, without a table lookup per row
+    CREATE INDEX IF NOT EXISTS idx_sensor_latest
+    ON sensor_data(timestamp DESC, temperature, humidity);
+    
+    CREATE INDEX IF NOT EXISTS idx_alarm_latest
+    ON alarms(timestamp DESC, message);
+    
+    -- Superseded by the covering indexes above
+    DROP INDEX IF EXISTS idx_sensor_timestamp;
+    DROP INDEX IF EXISTS idx_alarm_timestamp;
+    
+    COMMIT;
+'''
+
+def configure_connection(conn):
+    """
+    Apply the PRAGMAs every connection to the monitor database should use.
+    
+    journal_mode=WAL is stored in the database file and persists; busy_timeout,
+    synchronous, temp_store and cache_size only last for this connection, so other modules
+    should call this right after sqlite3.connect().
+    
+    Args:
+        conn: Open sqlite3 connection
+    
+    Returns:
+        str: Journal mode now in effect ('wal' unless the filesystem refused it)
+    """
+    # First, so that the WAL switch below also waits out a concurrent writer
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    journal_mode = conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KB}")
+    return journal_mode
 
-def create_database():
+def _format_timestamp(value):
+    """
+    Format a stored timestamp for display.
+    
+    Args:
+        value: Epoch seconds, or the DATETIME text used by databases created before
+            timestamps became integers
+    
+    Returns:
+        str: Local time as 'YYYY-MM-DD HH:MM:SS'
+    """
+    if isinstance(value, int):
+        return datetime.fromtimestamp(value).strftime('%Y-%m-%d %H:%M:%S')
+    return str(value)
+
+def _write_lines(lines):
+    """Write buffered report lines to stdout with a single write."""
+    if lines:
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
+
+def _prepare_new_file(conn):
+    """
+    Choose the on-disk layout of a brand-new database file.
+    
+    Page size and auto_vacuum can only be chosen before the first table exists (and
+    page size only outside WAL); older databases keep theirs unless rebuilt with a
+    full VACUUM.
+    
+    Args:
+        conn: Connection to a database that has no tables yet
+    """
+    conn.execute(f"PRAGMA page_size={PAGE_SIZE}")
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+
+def create_database(conn=None):
     """
     Create the SQLite database and initialize tables.
     
+    Args:
+        conn: Connection to use; defaults to the shared get_connection() one, which
+            is already configured. A connection passed in is configured here
+    
     Returns:
         bool: True if successful, False otherwise
     """
+    # Collected and written in one go rather than one print() syscall per line
+    lines = []
+    out = lines.append
     try:
-        # Check if database file already exists
-        db_exists = os.path.exists(DATABASE_FILE)
+        # Check if database file already exists; sqlite3.connect() leaves an empty file
+        # behind before the first write, which still takes a new file's layout
+        try:
+            db_exists = os.stat(DATABASE_FILE).st_size > 0
+        except FileNotFoundError:
+            db_exists = False
         
-        print("🗄️  SERVER ROOM COOLING MONITOR - DATABASE INITIALIZATION")
-        print("=" * 65)
+        out("🗄️  SERVER ROOM COOLING MONITOR - DATABASE INITIALIZATION")
+        out("=" * 65)
         
         if db_exists:
-            print(f"📁 Database file '{DATABASE_FILE}' already exists")
+            out(f"📁 Database file '{DATABASE_FILE}' already exists")
         else:
-            print(f"📁 Creating new database file: '{DATABASE_FILE}'")
+            out(f"📁 Creating new database file: '{DATABASE_FILE}'")
         
-        # Connect to database (creates file if it doesn't exist)
-        with sqlite3.connect(DATABASE_FILE) as conn:
+        # Connect to database (creates file if it doesn't exist). get_connection() has
+        # already prepared a new file and configured the connection, and page_size must
+        # not be set again once the file is in WAL
+        if conn is None:
+            conn = get_connection()
+            journal_mode = _journal_mode
+        else:
+            if not db_exists:
+                _prepare_new_file(conn)
+            journal_mode = configure_connection(conn)
+        with _conn_lock:
             cursor = conn.cursor()
             
-            print("\n🔧 Creating database tables...")
+            # WAL lets the GUI read while the data manager writes, with fewer fsyncs per commit
+            if journal_mode == "wal":
+                out("✅ Journal mode: WAL (synchronous=NORMAL)")
+            else:
+                out(f"⚠️  Could not enable WAL, journal mode is '{journal_mode}'")
             
-            # Create sensor_data table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS sensor_data (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    temperature REAL NOT NULL,
-                    humidity REAL NOT NULL
-                )
-            ''')
+            out("\n🔧 Creating database tables...")
             
-            print("✅ Table 'sensor_data' created/verified")
-            print("   • id (INTEGER PRIMARY KEY AUTOINCREMENT)")
-            print("   • timestamp (DATETIME, default current timestamp)")
-            print("   • temperature (REAL)")
-            print("   • humidity (REAL)")
+            # All tables and indexes are created in one transaction: a single commit,
+            # and no half-built schema if a statement fails
+            conn.executescript(SCHEMA_SQL)
             
-            # Create alarms table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS alarms (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    message TEXT NOT NULL
-                )
-            ''')
+            # Seed planner statistics for a new file only, outside the schema's write lock;
+            # existing databases are kept current by PRAGMA optimize in close_connection()
+            if not db_exists:
+                conn.execute("ANALYZE")
             
-            print("✅ Table 'alarms' created/verified")
-            print("   • id (INTEGER PRIMARY KEY AUTOINCREMENT)")
-            print("   • timestamp (DATETIME, default current timestamp)")
-            print("   • message (TEXT)")
+            out("✅ Table 'sensor_data' created/verified")
+            out("   • id (INTEGER PRIMARY KEY)")
+            out("   • timestamp (INTEGER, Unix epoch seconds, default now)")
+            out("   • temperature (REAL)")
+            out("   • humidity (REAL)")
             
-            # Create indexes for better query performance
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_sensor_timestamp 
-                ON sensor_data(timestamp)
-            ''')
+            out("✅ Table 'alarms' created/verified")
+            out("   • id (INTEGER PRIMARY KEY)")
+            out("   • timestamp (INTEGER, Unix epoch seconds, default now)")
+            out("   • message (TEXT)")
             
+            out("✅ Database indexes created for optimal performance")
+            
+            # Verify tables and their column counts with a single schema query
             cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_alarm_timestamp 
-                ON alarms(timestamp)
+                SELECT m.name, (SELECT COUNT(*) FROM pragma_table_info(m.name))
+                FROM sqlite_master AS m
+                WHERE m.type='table' AND m.name IN ('sensor_data', 'alarms')
             ''')
             
-            print("✅ Database indexes created for optimal performance")
+            tables = cursor.fetchall()
             
-            # Commit the changes
-            conn.commit()
+            out(f"\n📊 Database schema verification:")
+            out(f"   • Tables found: {[name for name, _ in tables]}")
+            for name, column_count in tables:
+                out(f"   • {name} columns: {column_count}")
             
-            # Verify tables were created by querying schema
-            cursor.execute('''
-                SELECT name FROM sqlite_master 
-                WHERE type='table' AND name IN ('sensor_data', 'alarms')
-            ''')
+            # Display database file info; the logical size includes pages still in the WAL,
+            # which the main file's size on disk does not
+            page_count = cursor.execute("PRAGMA page_count").fetchone()[0]
+            page_size = cursor.execute("PRAGMA page_size").fetchone()[0]
+            try:
+                wal_size = os.stat(DATABASE_FILE + "-wal").st_size
+            except FileNotFoundError:
+                wal_size = 0
+            out(f"\n💾 Database file information:")
+            out(f"   • File: {DATABASE_FILE}")
+            out(f"   • Size: {page_count * page_size} bytes ({page_count} pages of {page_size} bytes)")
+            out(f"   • WAL file: {wal_size} bytes")
+            out(f"   • Location: {os.path.abspath(DATABASE_FILE)}")
             
-            tables = cursor.fetchall()
-            table_names = [table[0] for table in tables]
-            
-            print(f"\n📊 Database schema verification:")
-            print(f"   • Tables found: {table_names}")
-            
-            # Get table info for sensor_data
-            cursor.execute("PRAGMA table_info(sensor_data)")
-            sensor_columns = cursor.fetchall()
-            print(f"   • sensor_data columns: {len(sensor_columns)}")
-            
-            # Get table info for alarms
-            cursor.execute("PRAGMA table_info(alarms)")
-            alarm_columns = cursor.fetchall()
-            print(f"   • alarms columns: {len(alarm_columns)}")
-            
-            # Display database file info
-            file_size = os.path.getsize(DATABASE_FILE)
-            print(f"\n💾 Database file information:")
-            print(f"   • File: {DATABASE_FILE}")
-            print(f"   • Size: {file_size} bytes")
-            print(f"   • Location: {os.path.abspath(DATABASE_FILE)}")
-            
-            print("\n" + "=" * 65)
-            print("🎉 DATABASE INITIALIZATION COMPLETED SUCCESSFULLY!")
-            print("=" * 65)
-            print("📋 Next steps:")
-            print("   1. Run 'python3 data_manager.py' to start the data manager")
-            print("   2. Run sensor emulators to populate the database")
-            print("   3. Monitor data with your GUI application")
-            print("=" * 65)
+            out("\n" + "=" * 65)
+            out("🎉 DATABASE INITIALIZATION COMPLETED SUCCESSFULLY!")
+            out("=" * 65)
+            out("📋 Next steps:")
+            out("   1. Run 'python3 data_manager.py' to start the data manager")
+            out("   2. Run sensor emulators to populate the database")
+            out("   3. Monitor data with your GUI application")
+            out("   • Writers: use bulk_insert_readings()/bulk_insert_alarms() for batched inserts")
+            out("=" * 65)
             
             return True
             
     except sqlite3.Error as e:
-        print(f"\n❌ SQLite error occurred: {e}")
+        out(f"\n❌ SQLite error occurred: {e}")
         return False
     except Exception as e:
-        print(f"\n❌ Unexpected error occurred: {e}")
+        out(f"\n❌ Unexpected error occurred: {e}")
+        return False
+    finally:
+        _write_lines(lines)
+
+# Shared connection handed out by get_connection(); its page cache survives between calls
+_conn = None
+_journal_mode = None  # as reported by configure_connection() when _conn was opened
+_conn_lock = threading.Lock()
+
+def get_connection():
+    """
+    Return the process-wide connection to the monitor database, opening it on first use.
+    
+    The connection is in autocommit mode, may be used from any thread (callers
+    must not use it concurrently), is configured by configure_connection() and
+    is optimized and closed at interpreter exit (or by close_connection()).
+    
+    Returns:
+        sqlite3.Connection: The shared connection
+    """
+    global _conn, _journal_mode
+    with _conn_lock:
+        if _conn is None:
+            new_file = not os.path.exists(DATABASE_FILE)
+            conn = sqlite3.connect(DATABASE_FILE, check_same_thread=False, isolation_level=None,
+                                   cached_statements=STATEMENT_CACHE_SIZE)
+            # Must happen before configure_connection() switches the file to WAL
+            if new_file:
+                _prepare_new_file(conn)
+            _journal_mode = configure_connection(conn)
+            # Long-lived reader: map the file so pages come straight from the OS cache
+            # (SQLite falls back to normal I/O where mmap is unavailable)
+            conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+            _conn = conn
+            atexit.register(close_connection)
+        return _conn
+
+def close_connection():
+    """Run PRAGMA optimize on the shared connection and close it."""
+    global _conn
+    with _conn_lock:
+        if _conn is None:
+            return
+        try:
+            _conn.execute("PRAGMA optimize")
+        except sqlite3.Error:
+            pass
+        _conn.close()
+        _conn = None
+
+def _bulk_insert(conn, sql, rows, chunk):
+    """Insert rows with one executemany() and one commit per chunk."""
+    rows = iter(rows)
+    total = 0
+    while True:
+        batch = list(itertools.islice(rows, chunk))
+        if not batch:
+            return total
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(sql, batch)
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        total += len(batch)
+
+def bulk_insert_readings(conn, rows, chunk=BULK_CHUNK_SIZE):
+    """
+    Insert sensor readings in batched transactions instead of one commit per row.
+    
+    Args:
+        conn: Connection with no open transaction, e.g. from get_connection()
+        rows: Iterable of (temperature, humidity) tuples
+        chunk: Rows per transaction
+    
+    Returns:
+        int: Number of readings inserted
+    """
+    return _bulk_insert(conn, _SQL_INSERT_READING, rows, chunk)
+
+def bulk_insert_alarms(conn, messages, chunk=BULK_CHUNK_SIZE):
+    """
+    Insert alarm messages in batched transactions instead of one commit per row.
+    
+    Args:
+        conn: Connection with no open transaction, e.g. from get_connection()
+        messages: Iterable of alarm message strings
+        chunk: Rows per transaction
+    
+    Returns:
+        int: Number of alarms inserted
+    """
+    return _bulk_insert(conn, _SQL_INSERT_ALARM, ((message,) for message in messages), chunk)
+
+def compact_database(pages=VACUUM_PAGES):
+    """
+    Return free pages left behind by deleted rows to the operating system.
+    
+    Only has an effect on databases created with auto_vacuum=INCREMENTAL.
+    
+    Args:
+        pages: Maximum number of free pages to release
+    
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    try:
+        # The connection's own context manager only commits; closing() also closes it
+        with contextlib.closing(sqlite3.connect(DATABASE_FILE)) as conn:
+            conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            # execute() steps this pragma only once (one page); executescript() runs it to completion
+            conn.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+        return True
+    except sqlite3.Error as e:
+        print(f"❌ Error compacting database: {e}")
         return False
 
-def check_database_status():
+def check_database_status(conn=None):
     """
     Check the current status of the database and display statistics.
+    
+    Args:
+        conn: Connection to use; defaults to the shared get_connection() one
     """
+    # Collected and written in one go rather than one print() syscall per line
+    lines = []
+    out = lines.append
     try:
         if not os.path.exists(DATABASE_FILE):
-            print(f"⚠️  Database file '{DATABASE_FILE}' does not exist")
+            out(f"⚠️  Database file '{DATABASE_FILE}' does not exist")
             return
         
-        with sqlite3.connect(DATABASE_FILE) as conn:
+        if conn is None:
+            conn = get_connection()
+        with _conn_lock:
             cursor = conn.cursor()
             
-            print(f"\n📈 DATABASE STATISTICS:")
-            print("-" * 40)
+            out(f"\n📈 DATABASE STATISTICS:")
+            out("-" * 40)
             
             # Count sensor data records
-            cursor.execute("SELECT COUNT(*) FROM sensor_data")
+            cursor.execute(_SQL_COUNT_SENSOR)
             sensor_count = cursor.fetchone()[0]
-            print(f"🌡️  Sensor readings: {sensor_count}")
+            out(f"🌡️  Sensor readings: {sensor_count}")
             
             # Count alarm records
-            cursor.execute("SELECT COUNT(*) FROM alarms")
+            cursor.execute(_SQL_COUNT_ALARM)
             alarm_count = cursor.fetchone()[0]
-            print(f"🚨 Alarm events: {alarm_count}")
+            out(f"🚨 Alarm events: {alarm_count}")
             
             # Get latest sensor reading
-            cursor.execute('''
-                SELECT timestamp, temperature, humidity 
-                FROM sensor_data 
-                ORDER BY timestamp DESC 
-                LIMIT 1
-            ''')
-            
+            cursor.execute(_SQL_LATEST_SENSOR)
             latest_sensor = cursor.fetchone()
             if latest_sensor:
-                print(f"📊 Latest reading: {latest_sensor[1]}°C, {latest_sensor[2]}% at {latest_sensor[0]}")
+                out(f"📊 Latest reading: {latest_sensor[1]}°C, {latest_sensor[2]}% at {_format_timestamp(latest_sensor[0])}")
             else:
-                print("📊 No sensor readings found")
+                out("📊 No sensor readings found")
             
             # Get latest alarm
-            cursor.execute('''
-                SELECT timestamp, message 
-                FROM alarms 
-                ORDER BY timestamp DESC 
-                LIMIT 1
-            ''')
-            
+            cursor.execute(_SQL_LATEST_ALARM)
             latest_alarm = cursor.fetchone()
             if latest_alarm:
-                print(f"⚠️  Latest alarm: {latest_alarm[1]} at {latest_alarm[0]}")
+                out(f"⚠️  Latest alarm: {latest_alarm[1]} at {_format_timestamp(latest_alarm[0])}")
             else:
-                print("⚠️  No alarms found")
+                out("⚠️  No alarms found")
                 
     except sqlite3.Error as e:
-        print(f"❌ Error checking database status: {e}")
+        out(f"❌ Error checking database status: {e}")
     except Exception as e:
-        print(f"❌ Unexpected error: {e}")
+        out(f"❌ Unexpected error: {e}")
+    finally:
+        _write_lines(lines)
+
+def parse_args(argv=None):
+    """
+    Parse command line options.
+    
+    Args:
+        argv: Arguments to parse (defaults to sys.argv[1:])
+    
+    Returns:
+        argparse.Namespace: Parsed options
+    """
+    parser = argparse.ArgumentParser(description="Initialize the Server Room Cooling Monitor database.")
+    # An explicit pair rather than argparse.BooleanOptionalAction, which needs Python 3.9
+    parser.add_argument("--status", dest="status", action="store_true",
+                        help="show database statistics after initialization "
+                             "(default: only when stdout is a terminal)")
+    parser.add_argument("--no-status", dest="status", action="store_false",
+                        help="skip the database statistics report")
+    parser.set_defaults(status=sys.stdout.isatty())
+    return parser.parse_args(argv)
 
 def main():
     """Main function to initialize the database."""
+    args = parse_args()
     print(f"🚀 Starting database initialization at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
-    # Create database and tables
-    success = create_database()
-    
-    if success:
-        # Display current database status
-        check_database_status()
-        return 0
-    else:
-        print("\n💥 Database initialization failed!")
-        return 1
+    # Both steps use the shared get_connection() connection, opened once by create_database()
+    # after it has checked whether the file is new
+    try:
+        # Create database and tables
+        success = create_database()
+        
+        if success:
+            # Display current database status; skipped for unattended runs
+            if args.status:
+                check_database_status()
+            return 0
+        else:
+            print("\n💥 Database initialization failed!")
+            return 1
+    finally:
+        close_connection()
 
 if __name__ == "__main__":
     exit(main())
@@ -14,8 +14,14 @@ Features:
 - Auto-refreshing dashboard with MQTT integration
 """
 
+import os
+import socket
 import sys
 import json
+import re
+import bisect
+import itertools
+from collections import deque
 import sqlite3
 import threading
 import time
@@ -25,16 +31,26 @@ from typing import Dict, Any, Optional
 import paho.mqtt.client as mqtt
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QGridLayout,
-    QWidget, QLabel, QTableWidget, QTableWidgetItem, QTextEdit,
+    QWidget, QLabel, QTableView, QTextEdit,
     QPushButton, QFrame, QScrollArea, QSplitter, QTabWidget
 )
-from PyQt5.QtCore import QTimer, pyqtSignal, QObject, Qt, QThread
-from PyQt5.QtGui import QFont, QPalette, QColor
+from PyQt5.QtCore import QTimer, pyqtSignal, pyqtSlot, QObject, Qt, QThread, QAbstractTableModel, QModelIndex
+from PyQt5.QtGui import QFont, QPalette, QColor, QTextCursor
+
+# orjson is optional; it parses the MQTT payload bytes directly
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
 
 # Configuration
 MQTT_BROKER = "broker.hivemq.com"
 MQTT_PORT = 1883
 MQTT_KEEPALIVE = 60
+# Stable per-host id so the broker keeps our session without two dashboards
+# taking over each other's; override with SRCM_GUI_CLIENT_ID
+MQTT_CLIENT_ID = os.environ.get("SRCM_GUI_CLIENT_ID") or f"srcm-gui-{socket.gethostname()}"
 
 # MQTT Topics
 TOPIC_SENSOR_DHT = "server_room/sensor/dht"
@@ -43,10 +59,139 @@ TOPIC_ALARM = "server_room/alarm"
 
 # Database configuration
 DATABASE_FILE = "server_room_monitor.db"
+DB_STATEMENT_CACHE = 32  # prepared statements kept on the database worker's connection
+
+# Dashboard queries; module constants so sqlite3's statement cache hits on every call
+_SQL_COUNT_SENSOR = "SELECT COUNT(*) FROM sensor_data"
+_SQL_COUNT_ALARMS = "SELECT COUNT(*) FROM alarms"
+_SQL_HISTORY = "SELECT id, timestamp, temperature, humidity FROM sensor_data ORDER BY timestamp DESC LIMIT ?"
+_SQL_ALARMS = "SELECT id, timestamp, message FROM alarms ORDER BY timestamp DESC LIMIT ?"
+# Same indexes the data manager creates; lets the two queries above walk an index instead of sorting
+_SQL_CREATE_INDEXES = """
+    CREATE INDEX IF NOT EXISTS idx_sensor_ts ON sensor_data(timestamp DESC);
+    CREATE INDEX IF NOT EXISTS idx_alarms_ts ON alarms(timestamp DESC);
+"""
 
 # GUI Update intervals
 UPDATE_INTERVAL_MS = 1000  # 1 second
-HISTORY_UPDATE_INTERVAL_MS = 5000  # 5 seconds
+SENSOR_REPAINT_INTERVAL_MS = 250  # readings are painted at most 4 times a second
+STATS_RECONCILE_INTERVAL_MS = 30000  # 30 seconds; counts are kept in memory between checks
+
+# Rows kept in the history and alarm tables
+HISTORY_TABLE_ROWS = 100
+ALARM_TABLE_ROWS = 50
+TABLE_FETCH_ROWS = 25  # rows formatted per fetchMore(), about one screenful
+RECENT_ALARM_LINES = 10  # lines kept in the dashboard's recent alarms panel
+ALARM_HISTORY_SIZE = 1000  # received alarms kept in memory; older ones are dropped
+ALARM_DEDUP_WINDOW = 0.5  # seconds an identical alarm is treated as a duplicate
+ALARM_DEDUP_PRUNE_SIZE = 64  # expired entries are pruned once the dedup table grows past this
+
+# Alarm text clean-up for the recent alarms panel: single-codepoint emoji are deleted in one
+# str.translate() pass, multi-codepoint emoji and units are rewritten in one regex pass
+_EMOJI_STRIP = str.maketrans('', '', '🚨🔄📤🔒⚡')
+_WORD_SUBS = {'⚠️': '', '🌡️': 'Temp', '💧': 'Humidity', '°C': 'C', '%': 'pct'}
+_WORD_RE = re.compile('|'.join(map(re.escape, _WORD_SUBS)))
+_MANUAL_TOGGLE_RE = re.compile(r"Manual button toggle:([^:]*?) - ")
+
+# Reading label styles, one pre-built stylesheet per color bucket
+_TEMP_THRESHOLDS = (22, 26, 30)
+_TEMP_SHEETS = (
+    "color: #3498db; text-align: center;",  # Blue (cool)
+    "color: #27ae60; text-align: center;",  # Green (normal)
+    "color: #f39c12; text-align: center;",  # Orange (warm)
+    "color: #e74c3c; text-align: center;",  # Red (hot)
+)
+_HUMIDITY_THRESHOLDS = (40, 70)
+_HUMIDITY_SHEETS = (
+    "color: #e67e22; text-align: center;",  # Orange (low)
+    "color: #27ae60; text-align: center;",  # Green (normal)
+    "color: #3498db; text-align: center;",  # Blue (high)
+)
+_FAN_ON_SHEET = "color: #27ae60; text-align: center;"
+_FAN_OFF_SHEET = "color: #e74c3c; text-align: center;"
+
+# Recent alarms panel text colors
+_COLOR_ALARM = QColor("#e74c3c")
+_COLOR_TEXT = QColor("#2c3e50")
+
+# Shared fonts, built on first use (a QFont needs the QApplication to exist)
+_FONTS = {}
+
+
+def _font(size, bold=False):
+    """Return the shared Arial font of a point size, creating it the first time it is asked for."""
+    key = (size, bold)
+    font = _FONTS.get(key)
+    if font is None:
+        font = _FONTS[key] = QFont("Arial", size, QFont.Bold) if bold else QFont("Arial", size)
+    return font
+
+
+def _temp_bucket(temp):
+    """Return the index into _TEMP_SHEETS for a temperature."""
+    return bisect.bisect(_TEMP_THRESHOLDS, temp)
+
+
+def _humidity_bucket(humidity):
+    """Return the index into _HUMIDITY_SHEETS for a humidity."""
+    return bisect.bisect(_HUMIDITY_THRESHOLDS, humidity)
+
+
+# The data manager's own timestamp format, e.g. "2025-09-19T13:03:00.123456+00:00"
+_ISO_UTC_RE = re.compile(r'(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})(?:\.\d+)?(?:\+00:00|Z)')
+# (UTC second, local display string) of the last data manager timestamp converted
+_local_ts_cache = ["", ""]
+
+
+def _local_timestamp(timestamp):
+    """
+    Convert a stored or received timestamp to local time for display.
+    
+    Args:
+        timestamp: ISO 8601 (UTC when it carries a zone) or 'YYYY-MM-DD HH:MM:SS' local time
+        
+    Returns:
+        str: Local time as 'YYYY-MM-DD HH:MM:SS'
+        
+    Raises:
+        ValueError, TypeError: If the timestamp is in none of the known formats
+    """
+    # Fast path for the data manager's format: the seconds prefix is converted once and reused
+    # for every timestamp in the same second (alarm bursts, consecutive table rows)
+    match = _ISO_UTC_RE.fullmatch(timestamp) if isinstance(timestamp, str) else None
+    if match:
+        second = match.group(1)
+        if second != _local_ts_cache[0]:
+            utc_dt = datetime.strptime(second, '%Y-%m-%dT%H:%M:%S').replace(tzinfo=timezone.utc)
+            _local_ts_cache[0] = second
+            _local_ts_cache[1] = utc_dt.astimezone().strftime('%Y-%m-%d %H:%M:%S')
+        return _local_ts_cache[1]
+    
+    # Handle different timestamp formats
+    if 'T' in timestamp and ('+' in timestamp or 'Z' in timestamp):
+        # ISO format with timezone info
+        dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+        if dt.tzinfo is not None:
+            local_dt = dt.astimezone()
+        else:
+            utc_dt = dt.replace(tzinfo=timezone.utc)
+            local_dt = utc_dt.astimezone()
+    elif 'T' in timestamp:
+        # ISO format without timezone - assume it's already local time
+        local_dt = datetime.fromisoformat(timestamp)
+    else:
+        # Simple format like "2025-09-19 13:03:00" - assume it's already local time
+        local_dt = datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S')
+    return local_dt.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _table_timestamp(timestamp):
+    """Format a database timestamp for the tables, keeping the original text if it cannot be parsed."""
+    try:
+        return _local_timestamp(timestamp)
+    except (TypeError, ValueError):
+        # Fallback: keep original timestamp
+        return str(timestamp)
 
 
 class MQTTWorker(QObject):
@@ -60,7 +205,8 @@ class MQTTWorker(QObject):
     
     def __init__(self):
         super().__init__()
-        self.client = mqtt.Client()
+        # Persistent session: alarms published while the dashboard is offline are queued for it
+        self.client = mqtt.Client(client_id=MQTT_CLIENT_ID, clean_session=False)
         # Configure client for better stability
         self.client.max_inflight_messages_set(20)
         self.is_connected = False
@@ -76,15 +222,18 @@ class MQTTWorker(QObject):
             self.is_connected = True
             self.connection_status_changed.emit(True)
             
-            # Subscribe to all topics
+            # A resumed session still holds every subscription, so skip the SUBSCRIBE round trip
+            if flags.get('session present', 0):
+                return
+            
+            # Subscribe to all topics in one SUBSCRIBE; sensor readings are latest-value-wins,
+            # so QoS 0 saves the PUBACK per reading, while relay and alarm messages must arrive
             topics = [
-                (TOPIC_SENSOR_DHT, 1),
+                (TOPIC_SENSOR_DHT, 0),
                 (TOPIC_RELAY, 1),
                 (TOPIC_ALARM, 1)
             ]
-            
-            for topic, qos in topics:
-                client.subscribe(topic, qos)
+            client.subscribe(topics)
         else:
             self.is_connected = False
             self.connection_status_changed.emit(False)
@@ -98,53 +247,220 @@ class MQTTWorker(QObject):
         """Callback for when a message is received from the broker."""
         try:
             topic = msg.topic
-            payload = msg.payload.decode('utf-8')
             
             if topic == TOPIC_SENSOR_DHT:
-                # Parse sensor data
-                data = json.loads(payload)
+                # Parse sensor data straight from the payload bytes
+                data = json_loads(msg.payload)
                 self.sensor_data_received.emit(data)
                 
             elif topic == TOPIC_RELAY:
                 # Relay status message
-                self.relay_status_received.emit(payload.upper())
+                self.relay_status_received.emit(msg.payload.decode('utf-8').upper())
                 
             elif topic == TOPIC_ALARM:
                 # Parse alarm data
                 try:
-                    alarm_data = json.loads(payload)
-                except json.JSONDecodeError:
+                    alarm_data = json_loads(msg.payload)
+                except json.JSONDecodeError:  # orjson.JSONDecodeError subclasses it
                     # Handle simple string alarms
                     alarm_data = {
                         "timestamp": datetime.now(timezone.utc).isoformat(),
-                        "message": payload,
+                        "message": msg.payload.decode('utf-8'),
                         "level": "info"
                     }
-                self.alarm_received.emit(alarm_data)
+                # Bursts of alarms arrive batched as a JSON array
+                if isinstance(alarm_data, list):
+                    for alarm in alarm_data:
+                        self.alarm_received.emit(alarm)
+                else:
+                    self.alarm_received.emit(alarm_data)
                 
         except Exception as e:
             print(f"Error processing MQTT message: {e}")
     
-    def connect_to_broker(self):
-        """Connect to the MQTT broker."""
+    def run(self):
+        """
+        Connect to the MQTT broker and run the network loop until disconnected.
+        
+        Runs on the worker's QThread, so paho does not start a network thread of its own.
+        An unreachable broker is retried with paho's reconnect backoff.
+        """
         try:
-            self.client.connect(MQTT_BROKER, MQTT_PORT, MQTT_KEEPALIVE)
-            self.client.loop_start()
+            self.client.connect_async(MQTT_BROKER, MQTT_PORT, MQTT_KEEPALIVE)
+            self.client.loop_forever(retry_first_connection=True)
         except Exception as e:
             print(f"Error connecting to MQTT broker: {e}")
     
     def disconnect_from_broker(self):
-        """Disconnect from the MQTT broker."""
+        """Disconnect from the MQTT broker, which also ends run()."""
         try:
-            self.client.loop_stop()
             self.client.disconnect()
         except Exception as e:
             print(f"Error disconnecting from MQTT broker: {e}")
 
 
+class DatabaseWorker(QObject):
+    """Worker thread for the dashboard's SQLite queries, so disk reads never block the GUI."""
+    
+    # Define signals for replies to the main thread
+    history_ready = pyqtSignal(list)
+    alarms_ready = pyqtSignal(list)
+    counts_ready = pyqtSignal(int, int)
+    counts_failed = pyqtSignal()
+    
+    def __init__(self, database_file=DATABASE_FILE):
+        super().__init__()
+        self.database_file = database_file
+        self.db = None  # opened on the worker thread, which is the only one that uses it
+    
+    @pyqtSlot()
+    def open(self):
+        """Open the worker's long-lived connection, tuned for reading alongside the data manager's writes."""
+        try:
+            self.db = sqlite3.connect(self.database_file, cached_statements=DB_STATEMENT_CACHE)
+            # WAL lets these reads run while the data manager is writing
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.execute("PRAGMA temp_store=MEMORY")
+            self.db.execute("PRAGMA cache_size=-8000")  # ~8 MB
+        except Exception as e:
+            print(f"Error opening database: {e}")
+            return
+        
+        # Databases written by an older data manager may lack the alarm index
+        try:
+            self.db.executescript(_SQL_CREATE_INDEXES)
+        except sqlite3.OperationalError as e:
+            # Tables do not exist until the data manager has run
+            print(f"Could not create database indexes: {e}")
+    
+    @pyqtSlot()
+    def fetch_history(self):
+        """Query the newest sensor readings and emit them as history_ready."""
+        try:
+            self.history_ready.emit(self.db.execute(_SQL_HISTORY, (HISTORY_TABLE_ROWS,)).fetchall())
+        except Exception as e:
+            print(f"Error loading historical data: {e}")
+    
+    @pyqtSlot()
+    def fetch_alarms(self):
+        """Query the newest alarms and emit them as alarms_ready."""
+        try:
+            self.alarms_ready.emit(self.db.execute(_SQL_ALARMS, (ALARM_TABLE_ROWS,)).fetchall())
+        except Exception as e:
+            print(f"Error loading alarms data: {e}")
+    
+    @pyqtSlot()
+    def fetch_counts(self):
+        """Count sensor readings and alarms and emit them as counts_ready."""
+        try:
+            sensor_count = self.db.execute(_SQL_COUNT_SENSOR).fetchone()[0]
+            alarm_count = self.db.execute(_SQL_COUNT_ALARMS).fetchone()[0]
+            self.counts_ready.emit(sensor_count, alarm_count)
+        except Exception as e:
+            print(f"Error updating database stats: {e}")
+            self.counts_failed.emit()
+    
+    @pyqtSlot()
+    def close(self):
+        """Close the worker's connection."""
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+
+class RowTableModel(QAbstractTableModel):
+    """
+    Read-only table model over a list of pre-formatted rows, newest first.
+    
+    Rows given to set_rows() are pulled lazily through Qt's canFetchMore()/fetchMore(),
+    so a reload formats just the rows the view needs and the rest only as it scrolls.
+    """
+    
+    def __init__(self, headers, max_rows, parent=None):
+        """
+        Initialize the table model.
+        
+        Args:
+            headers: Column header labels
+            max_rows: Rows kept; the oldest are dropped as new ones are prepended
+            parent: Optional Qt parent object
+        """
+        super().__init__(parent)
+        self._headers = headers
+        self._max_rows = max_rows
+        self._rows = []
+        self._pending = None  # iterator over rows set_rows() has not loaded yet
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._headers)
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self._headers[section]
+        return super().headerData(section, orientation, role)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            return self._rows[index.row()][index.column()]
+        return None
+    
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._pending is not None
+    
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        wanted = min(TABLE_FETCH_ROWS, self._max_rows - len(self._rows))
+        batch = list(itertools.islice(self._pending, wanted))
+        if len(batch) < wanted or len(self._rows) + len(batch) >= self._max_rows:
+            self._pending = None
+        if batch:
+            self.beginInsertRows(QModelIndex(), len(self._rows), len(self._rows) + len(batch) - 1)
+            self._rows.extend(batch)
+            self.endInsertRows()
+    
+    def set_rows(self, rows):
+        """
+        Replace every row in the model, loading the first batch straight away.
+        
+        Args:
+            rows: Iterable of rows of cell texts, newest first; consumed lazily
+        """
+        self.beginResetModel()
+        self._rows = []
+        self._pending = iter(rows)
+        self.endResetModel()
+        self.fetchMore()
+    
+    def prepend(self, row):
+        """
+        Insert a row at the top, dropping the oldest beyond max_rows.
+        
+        Args:
+            row: Tuple of cell texts
+        """
+        self.beginInsertRows(QModelIndex(), 0, 0)
+        self._rows.insert(0, row)
+        self.endInsertRows()
+        if len(self._rows) > self._max_rows:
+            self._pending = None  # anything not loaded yet is older than the rows being dropped
+            self.beginRemoveRows(QModelIndex(), self._max_rows, len(self._rows) - 1)
+            del self._rows[self._max_rows:]
+            self.endRemoveRows()
+
+
 class ServerRoomMonitorGUI(QMainWindow):
     """Main GUI application for the Server Room Cooling Monitor."""
     
+    # Requests to the database worker; queued onto its thread
+    history_requested = pyqtSignal()
+    alarms_requested = pyqtSignal()
+    counts_requested = pyqtSignal()
+    
     def __init__(self):
         super().__init__()
         self.setWindowTitle("🏢 Server Room Cooling Monitor")
@@ -153,13 +469,20 @@ class ServerRoomMonitorGUI(QMainWindow):
         # Data storage
         self.current_temperature = 0.0
         self.current_humidity = 0.0
+        self._pending_sensor = None  # latest (temperature, humidity), painted by the repaint timer
+        self._painted_sensor = None
+        self._last_temp_bucket = None
+        self._last_humidity_bucket = None
         self.fan_status = "OFF"
         self.mqtt_connected = False
-        self.alarm_messages = []
+        self.alarm_messages = deque(maxlen=ALARM_HISTORY_SIZE)
+        self._recent_alarms = deque(maxlen=RECENT_ALARM_LINES)  # lines shown in the recent alarms panel
+        # (text, is_timeout) lines waiting for _flush_alarms; older ones would be trimmed anyway
+        self._pending_alarm_lines = deque(maxlen=RECENT_ALARM_LINES)
+        self._flush_scheduled = False
         
-        # Duplicate message filtering
-        self.last_alarm_message = None
-        self.last_alarm_time = 0
+        # Duplicate message filtering: message -> time.monotonic() until which repeats are dropped
+        self._recent_alarm_expiry = {}
         
         # Initialize MQTT worker
         self.mqtt_thread = QThread()
@@ -173,15 +496,44 @@ class ServerRoomMonitorGUI(QMainWindow):
         self.mqtt_worker.connection_status_changed.connect(self.update_connection_status)
         
         # Start MQTT thread
-        self.mqtt_thread.started.connect(self.mqtt_worker.connect_to_broker)
+        self.mqtt_thread.started.connect(self.mqtt_worker.run)
         self.mqtt_thread.start()
         
+        # Initialize database worker; every dashboard query runs on its thread
+        self.db_thread = QThread()
+        self.db_worker = DatabaseWorker()
+        self.db_worker.moveToThread(self.db_thread)
+        
+        # Connect signals
+        self.history_requested.connect(self.db_worker.fetch_history)
+        self.alarms_requested.connect(self.db_worker.fetch_alarms)
+        self.counts_requested.connect(self.db_worker.fetch_counts)
+        self.db_worker.history_ready.connect(self.show_historical_data)
+        self.db_worker.alarms_ready.connect(self.show_alarms_data)
+        self.db_worker.counts_ready.connect(self.show_database_stats)
+        self.db_worker.counts_failed.connect(self.show_database_error)
+        
+        # Start database thread; the connection is opened and closed on the thread itself
+        self.db_thread.started.connect(self.db_worker.open)
+        self.db_thread.finished.connect(self.db_worker.close)
+        self.db_thread.start()
+        
+        # Row counts shown in the stats label, counted from the database once and then kept up to date from MQTT
+        self._sensor_count = 0
+        self._alarm_count = 0
+        
         # Set up UI
         self.init_ui()
+        self.update_database_stats()
+        self.update_time_display()
         
         # Set up timers for periodic updates
         self.setup_timers()
         
+        # Populate the tables once; after that live MQTT messages are prepended as they arrive
+        self.load_historical_data()
+        self.load_alarms_data()
+        
         # Apply styling
         self.apply_styling()
     
@@ -220,18 +572,18 @@ class ServerRoomMonitorGUI(QMainWindow):
         
         # Title
         title_label = QLabel("🏢 Server Room Cooling Monitor")
-        title_label.setFont(QFont("Arial", 18, QFont.Bold))
-        title_label.setStyleSheet("color: #2c3e50; margin: 10px;")
+        title_label.setFont(_font(18, bold=True))
+        title_label.setObjectName("pageTitle")
         
         # Connection status
         self.connection_label = QLabel("🔴 Disconnected")
-        self.connection_label.setFont(QFont("Arial", 12))
+        self.connection_label.setFont(_font(12))
         self.connection_label.setStyleSheet("color: #e74c3c; margin: 10px;")
         
         # Current time
         self.time_label = QLabel()
-        self.time_label.setFont(QFont("Arial", 12))
-        self.time_label.setStyleSheet("color: #7f8c8d; margin: 10px;")
+        self.time_label.setFont(_font(12))
+        self.time_label.setObjectName("headerTime")
         
         header_layout.addWidget(title_label)
         header_layout.addStretch()
@@ -264,14 +616,14 @@ class ServerRoomMonitorGUI(QMainWindow):
         """Create frame for current sensor readings."""
         frame = QFrame()
         frame.setFrameStyle(QFrame.Box)
-        frame.setStyleSheet("QFrame { border: 2px solid #bdc3c7; border-radius: 10px; margin: 5px; }")
+        frame.setObjectName("card")
         
         layout = QVBoxLayout(frame)
         
         # Title
         title = QLabel("🌡️ Current Sensor Readings")
-        title.setFont(QFont("Arial", 14, QFont.Bold))
-        title.setStyleSheet("color: #2c3e50; margin-bottom: 10px;")
+        title.setFont(_font(14, bold=True))
+        title.setObjectName("cardTitle")
         layout.addWidget(title)
         
         # Readings layout
@@ -280,12 +632,12 @@ class ServerRoomMonitorGUI(QMainWindow):
         # Temperature
         temp_layout = QVBoxLayout()
         temp_desc = QLabel("Temperature")
-        temp_desc.setFont(QFont("Arial", 12, QFont.Bold))
-        temp_desc.setStyleSheet("color: #2c3e50; margin-bottom: 5px;")
+        temp_desc.setFont(_font(12, bold=True))
+        temp_desc.setObjectName("cardLabel")
         temp_desc.setAlignment(Qt.AlignCenter)
         
         self.temperature_label = QLabel("--°C")
-        self.temperature_label.setFont(QFont("Arial", 24, QFont.Bold))
+        self.temperature_label.setFont(_font(24, bold=True))
         self.temperature_label.setStyleSheet("color: #e67e22; text-align: center;")
         self.temperature_label.setAlignment(Qt.AlignCenter)
         
@@ -295,12 +647,12 @@ class ServerRoomMonitorGUI(QMainWindow):
         # Humidity
         humidity_layout = QVBoxLayout()
         humidity_desc = QLabel("Humidity")
-        humidity_desc.setFont(QFont("Arial", 12, QFont.Bold))
-        humidity_desc.setStyleSheet("color: #2c3e50; margin-bottom: 5px;")
+        humidity_desc.setFont(_font(12, bold=True))
+        humidity_desc.setObjectName("cardLabel")
         humidity_desc.setAlignment(Qt.AlignCenter)
         
         self.humidity_label = QLabel("--%")
-        self.humidity_label.setFont(QFont("Arial", 24, QFont.Bold))
+        self.humidity_label.setFont(_font(24, bold=True))
         self.humidity_label.setStyleSheet("color: #3498db; text-align: center;")
         self.humidity_label.setAlignment(Qt.AlignCenter)
         
@@ -317,14 +669,14 @@ class ServerRoomMonitorGUI(QMainWindow):
         """Create frame for system status."""
         frame = QFrame()
         frame.setFrameStyle(QFrame.Box)
-        frame.setStyleSheet("QFrame { border: 2px solid #bdc3c7; border-radius: 10px; margin: 5px; }")
+        frame.setObjectName("card")
         
         layout = QVBoxLayout(frame)
         
         # Title
         title = QLabel("⚡ System Status")
-        title.setFont(QFont("Arial", 14, QFont.Bold))
-        title.setStyleSheet("color: #2c3e50; margin-bottom: 10px;")
+        title.setFont(_font(14, bold=True))
+        title.setObjectName("cardTitle")
         layout.addWidget(title)
         
         # Status layout
@@ -333,12 +685,12 @@ class ServerRoomMonitorGUI(QMainWindow):
         # Fan status
         fan_layout = QVBoxLayout()
         fan_desc = QLabel("Cooling Fan")
-        fan_desc.setFont(QFont("Arial", 12, QFont.Bold))
-        fan_desc.setStyleSheet("color: #2c3e50; margin-bottom: 5px;")
+        fan_desc.setFont(_font(12, bold=True))
+        fan_desc.setObjectName("cardLabel")
         fan_desc.setAlignment(Qt.AlignCenter)
         
         self.fan_status_label = QLabel("🔴 OFF")
-        self.fan_status_label.setFont(QFont("Arial", 18, QFont.Bold))
+        self.fan_status_label.setFont(_font(18, bold=True))
         self.fan_status_label.setAlignment(Qt.AlignCenter)
         self.fan_status_label.setStyleSheet("color: #e74c3c; text-align: center;")
         
@@ -348,13 +700,13 @@ class ServerRoomMonitorGUI(QMainWindow):
         # Database stats
         stats_layout = QVBoxLayout()
         stats_desc = QLabel("Database Records")
-        stats_desc.setFont(QFont("Arial", 12, QFont.Bold))
-        stats_desc.setStyleSheet("color: #2c3e50; margin-bottom: 5px;")
+        stats_desc.setFont(_font(12, bold=True))
+        stats_desc.setObjectName("cardLabel")
         stats_desc.setAlignment(Qt.AlignCenter)
         
         self.db_stats_label = QLabel("📊 Loading...")
-        self.db_stats_label.setFont(QFont("Arial", 12))
-        self.db_stats_label.setStyleSheet("color: #7f8c8d;")
+        self.db_stats_label.setFont(_font(12))
+        self.db_stats_label.setObjectName("cardDetail")
         self.db_stats_label.setAlignment(Qt.AlignCenter)
         
         stats_layout.addWidget(stats_desc)
@@ -370,30 +722,21 @@ class ServerRoomMonitorGUI(QMainWindow):
         """Create frame for recent alarms."""
         frame = QFrame()
         frame.setFrameStyle(QFrame.Box)
-        frame.setStyleSheet("QFrame { border: 2px solid #bdc3c7; border-radius: 10px; margin: 5px; }")
+        frame.setObjectName("card")
         
         layout = QVBoxLayout(frame)
         
         # Title
         title = QLabel("🚨 Recent Alarms")
-        title.setFont(QFont("Arial", 14, QFont.Bold))
-        title.setStyleSheet("color: #2c3e50; margin-bottom: 10px;")
+        title.setFont(_font(14, bold=True))
+        title.setObjectName("cardTitle")
         layout.addWidget(title)
         
         # Alarms text area
         self.recent_alarms_text = QTextEdit()
         self.recent_alarms_text.setMaximumHeight(150)
         self.recent_alarms_text.setReadOnly(True)
-        self.recent_alarms_text.setStyleSheet("""
-            QTextEdit {
-                background-color: #ecf0f1;
-                border: 1px solid #bdc3c7;
-                border-radius: 5px;
-                padding: 5px;
-                font-family: 'Courier New', monospace;
-                color: #2c3e50;
-            }
-        """)
+        self.recent_alarms_text.setObjectName("recentAlarms")
         
         layout.addWidget(self.recent_alarms_text)
         return frame
@@ -405,56 +748,24 @@ class ServerRoomMonitorGUI(QMainWindow):
         
         # Title
         title = QLabel("📈 Historical Sensor Data")
-        title.setFont(QFont("Arial", 14, QFont.Bold))
-        title.setStyleSheet("color: #2c3e50; margin: 10px;")
+        title.setFont(_font(14, bold=True))
+        title.setObjectName("pageTitle")
         layout.addWidget(title)
         
         # Historical data table
-        self.history_table = QTableWidget()
-        self.history_table.setColumnCount(4)
-        self.history_table.setHorizontalHeaderLabels(["ID", "Timestamp", "Temperature (°C)", "Humidity (%)"])
+        self.history_model = RowTableModel(["ID", "Timestamp", "Temperature (°C)", "Humidity (%)"],
+                                           HISTORY_TABLE_ROWS, self)
+        self.history_table = QTableView()
+        self.history_table.setModel(self.history_model)
         self.history_table.setAlternatingRowColors(True)
-        self.history_table.setStyleSheet("""
-            QTableWidget {
-                gridline-color: #bdc3c7;
-                background-color: white;
-                color: #2c3e50;
-            }
-            QTableWidget::item {
-                padding: 5px;
-                color: #2c3e50;
-                border-bottom: 1px solid #ecf0f1;
-            }
-            QTableWidget::item:selected {
-                background-color: #3498db;
-                color: white;
-            }
-            QHeaderView::section {
-                background-color: #34495e;
-                color: white;
-                padding: 5px;
-                font-weight: bold;
-            }
-        """)
+        self.history_table.setObjectName("historyTable")
         
         layout.addWidget(self.history_table)
         
         # Refresh button
         refresh_button = QPushButton("🔄 Refresh Data")
         refresh_button.clicked.connect(self.load_historical_data)
-        refresh_button.setStyleSheet("""
-            QPushButton {
-                background-color: #3498db;
-                color: white;
-                border: none;
-                padding: 10px;
-                border-radius: 5px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #2980b9;
-            }
-        """)
+        refresh_button.setObjectName("refreshButton")
         layout.addWidget(refresh_button)
         
         return history_widget
@@ -466,56 +777,23 @@ class ServerRoomMonitorGUI(QMainWindow):
         
         # Title
         title = QLabel("🚨 Alarm History")
-        title.setFont(QFont("Arial", 14, QFont.Bold))
-        title.setStyleSheet("color: #2c3e50; margin: 10px;")
+        title.setFont(_font(14, bold=True))
+        title.setObjectName("pageTitle")
         layout.addWidget(title)
         
         # Alarms table
-        self.alarms_table = QTableWidget()
-        self.alarms_table.setColumnCount(3)
-        self.alarms_table.setHorizontalHeaderLabels(["ID", "Timestamp", "Message"])
+        self.alarms_model = RowTableModel(["ID", "Timestamp", "Message"], ALARM_TABLE_ROWS, self)
+        self.alarms_table = QTableView()
+        self.alarms_table.setModel(self.alarms_model)
         self.alarms_table.setAlternatingRowColors(True)
-        self.alarms_table.setStyleSheet("""
-            QTableWidget {
-                gridline-color: #bdc3c7;
-                background-color: white;
-                color: #2c3e50;
-            }
-            QTableWidget::item {
-                padding: 5px;
-                color: #2c3e50;
-                border-bottom: 1px solid #ecf0f1;
-            }
-            QTableWidget::item:selected {
-                background-color: #e74c3c;
-                color: white;
-            }
-            QHeaderView::section {
-                background-color: #e74c3c;
-                color: white;
-                padding: 5px;
-                font-weight: bold;
-            }
-        """)
+        self.alarms_table.setObjectName("alarmsTable")
         
         layout.addWidget(self.alarms_table)
         
         # Clear alarms button
         clear_button = QPushButton("🗑️ Clear Display")
         clear_button.clicked.connect(self.clear_alarm_display)
-        clear_button.setStyleSheet("""
-            QPushButton {
-                background-color: #e74c3c;
-                color: white;
-                border: none;
-                padding: 10px;
-                border-radius: 5px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #c0392b;
-            }
-        """)
+        clear_button.setObjectName("clearButton")
         layout.addWidget(clear_button)
         
         return alarms_widget
@@ -527,23 +805,26 @@ class ServerRoomMonitorGUI(QMainWindow):
         self.time_timer.timeout.connect(self.update_time_display)
         self.time_timer.start(1000)  # Update every second
         
-        # Timer for updating database stats
+        # Timer for painting the latest sensor reading, so bursts of MQTT messages cost one repaint
+        self.sensor_timer = QTimer()
+        self.sensor_timer.timeout.connect(self.repaint_sensor_data)
+        self.sensor_timer.start(SENSOR_REPAINT_INTERVAL_MS)
+        
+        # Timer for re-counting database rows, in case another writer inserted rows we never saw
         self.stats_timer = QTimer()
         self.stats_timer.timeout.connect(self.update_database_stats)
-        self.stats_timer.start(HISTORY_UPDATE_INTERVAL_MS)
-        
-        # Timer for loading historical data
-        self.history_timer = QTimer()
-        self.history_timer.timeout.connect(self.load_historical_data)
-        self.history_timer.start(HISTORY_UPDATE_INTERVAL_MS)
+        self.stats_timer.start(STATS_RECONCILE_INTERVAL_MS)
         
-        # Timer for loading alarms data
-        self.alarms_timer = QTimer()
-        self.alarms_timer.timeout.connect(self.load_alarms_data)
-        self.alarms_timer.start(HISTORY_UPDATE_INTERVAL_MS)
+        # History and alarm tables are not polled: they are filled from the database once
+        # (and on Refresh) and then updated from MQTT messages
     
     def apply_styling(self):
-        """Apply overall styling to the application."""
+        """
+        Apply the application's stylesheet.
+        
+        Every static style lives in this one sheet, parsed once and matched by object name;
+        only the labels whose color follows live state set their own small sheet.
+        """
         self.setStyleSheet("""
             QMainWindow {
                 background-color: #ecf0f1;
@@ -569,102 +850,212 @@ class ServerRoomMonitorGUI(QMainWindow):
             QTabBar::tab:hover {
                 background-color: #7f8c8d;
             }
+            
+            QLabel#pageTitle {
+                color: #2c3e50;
+                margin: 10px;
+            }
+            QLabel#headerTime {
+                color: #7f8c8d;
+                margin: 10px;
+            }
+            
+            /* Dashboard cards; QLabel and QTextEdit are QFrames too, so card contents share the border */
+            #card, #card QFrame {
+                border: 2px solid #bdc3c7;
+                border-radius: 10px;
+                margin: 5px;
+            }
+            QLabel#cardTitle {
+                color: #2c3e50;
+                margin-bottom: 10px;
+            }
+            QLabel#cardLabel {
+                color: #2c3e50;
+                margin-bottom: 5px;
+            }
+            QLabel#cardDetail {
+                color: #7f8c8d;
+            }
+            QTextEdit#recentAlarms {
+                background-color: #ecf0f1;
+                border: 1px solid #bdc3c7;
+                border-radius: 5px;
+                padding: 5px;
+                font-family: 'Courier New', monospace;
+                color: #2c3e50;
+            }
+            
+            QTableView#historyTable, QTableView#alarmsTable {
+                gridline-color: #bdc3c7;
+                background-color: white;
+                color: #2c3e50;
+            }
+            QTableView#historyTable::item, QTableView#alarmsTable::item {
+                padding: 5px;
+                color: #2c3e50;
+                border-bottom: 1px solid #ecf0f1;
+            }
+            QTableView#historyTable::item:selected {
+                background-color: #3498db;
+                color: white;
+            }
+            QTableView#alarmsTable::item:selected {
+                background-color: #e74c3c;
+                color: white;
+            }
+            QTableView#historyTable QHeaderView::section {
+                background-color: #34495e;
+                color: white;
+                padding: 5px;
+                font-weight: bold;
+            }
+            QTableView#alarmsTable QHeaderView::section {
+                background-color: #e74c3c;
+                color: white;
+                padding: 5px;
+                font-weight: bold;
+            }
+            
+            QPushButton#refreshButton, QPushButton#clearButton {
+                color: white;
+                border: none;
+                padding: 10px;
+                border-radius: 5px;
+                font-weight: bold;
+            }
+            QPushButton#refreshButton {
+                background-color: #3498db;
+            }
+            QPushButton#refreshButton:hover {
+                background-color: #2980b9;
+            }
+            QPushButton#clearButton {
+                background-color: #e74c3c;
+            }
+            QPushButton#clearButton:hover {
+                background-color: #c0392b;
+            }
         """)
     
     def update_sensor_data(self, data):
         """Update sensor data display."""
         try:
-            self.current_temperature = float(data.get('temp', 0))
-            self.current_humidity = float(data.get('hum', 0))
+            temperature = data.get('temp', 0)
+            humidity = data.get('hum', 0)
+            # JSON numbers already decode to float; only convert other payloads (ints, numeric strings)
+            if type(temperature) is not float:
+                temperature = float(temperature)
+            if type(humidity) is not float:
+                humidity = float(humidity)
+            self.current_temperature = temperature
+            self.current_humidity = humidity
             
-            # Update temperature display with color coding
-            temp_color = self.get_temperature_color(self.current_temperature)
-            self.temperature_label.setText(f"{self.current_temperature:.1f}°C")
-            self.temperature_label.setStyleSheet(f"color: {temp_color}; text-align: center;")
+            # The labels are updated by repaint_sensor_data on the next repaint tick
+            self._pending_sensor = (temperature, humidity)
             
-            # Update humidity display with color coding
-            humidity_color = self.get_humidity_color(self.current_humidity)
-            self.humidity_label.setText(f"{self.current_humidity:.1f}%")
-            self.humidity_label.setStyleSheet(f"color: {humidity_color}; text-align: center;")
+            # The data manager assigns the row id when it stores the reading, so live rows have none
+            self.history_model.prepend((
+                "",
+                self._current_time_full,
+                "%.1f" % temperature,
+                "%.1f" % humidity,
+            ))
+            
+            self._sensor_count += 1
+            self._refresh_stats_label()
             
         except Exception as e:
             print(f"Error updating sensor data: {e}")
     
+    def repaint_sensor_data(self):
+        """Paint the latest sensor reading, if it changed since the last paint."""
+        if self._pending_sensor == self._painted_sensor:
+            return
+        temperature, humidity = self._painted_sensor = self._pending_sensor
+        
+        # Update temperature display with color coding; restyling only when the color bucket changes
+        self.temperature_label.setText("%.1f°C" % temperature)
+        temp_bucket = _temp_bucket(temperature)
+        if temp_bucket != self._last_temp_bucket:
+            self._last_temp_bucket = temp_bucket
+            self.temperature_label.setStyleSheet(_TEMP_SHEETS[temp_bucket])
+        
+        # Update humidity display with color coding
+        self.humidity_label.setText("%.1f%%" % humidity)
+        humidity_bucket = _humidity_bucket(humidity)
+        if humidity_bucket != self._last_humidity_bucket:
+            self._last_humidity_bucket = humidity_bucket
+            self.humidity_label.setStyleSheet(_HUMIDITY_SHEETS[humidity_bucket])
+    
     def update_fan_status(self, status):
         """Update fan status display."""
         try:
+            # Relay status is republished often; only repaint when the displayed state flips
+            changed = (status == "ON") != (self.fan_status == "ON")
             self.fan_status = status
+            if not changed:
+                return
             if status == "ON":
                 self.fan_status_label.setText("🟢 ON")
-                self.fan_status_label.setStyleSheet("color: #27ae60; text-align: center;")
+                self.fan_status_label.setStyleSheet(_FAN_ON_SHEET)
             else:
                 self.fan_status_label.setText("🔴 OFF")
-                self.fan_status_label.setStyleSheet("color: #e74c3c; text-align: center;")
+                self.fan_status_label.setStyleSheet(_FAN_OFF_SHEET)
         except Exception as e:
             print(f"Error updating fan status: {e}")
     
     def add_alarm_message(self, alarm_data):
         """Add new alarm message."""
         try:
-            timestamp = alarm_data.get('timestamp', datetime.now(timezone.utc).isoformat())
+            timestamp = alarm_data.get('timestamp')
             message = alarm_data.get('message', 'Unknown alarm')
             level = alarm_data.get('level', 'info')
             
             print(f"📨 Received alarm: {message[:50]}...")
             
             # Check for duplicate alarm messages (only filter rapid duplicates)
-            current_time = time.time()
-            if (self.last_alarm_message == message and 
-                current_time - self.last_alarm_time < 0.5):  # 0.5 second window for true duplicates
+            # Monotonic, so clock adjustments cannot open or close the window
+            current_time = time.monotonic()
+            expiry = self._recent_alarm_expiry.get(message)
+            if expiry is not None and current_time < expiry:
                 print(f"Duplicate alarm filtered: {message}")
                 return  # Skip duplicate
             
-            # Update last alarm tracking
-            self.last_alarm_message = message
-            self.last_alarm_time = current_time
+            # Track this alarm, dropping expired entries once enough have built up
+            if len(self._recent_alarm_expiry) >= ALARM_DEDUP_PRUNE_SIZE:
+                self._recent_alarm_expiry = {
+                    msg: until for msg, until in self._recent_alarm_expiry.items() if until > current_time
+                }
+            self._recent_alarm_expiry[message] = current_time + ALARM_DEDUP_WINDOW
             
-            # Format timestamp for display
-            try:
-                # Handle different timestamp formats
-                if 'T' in timestamp and ('+' in timestamp or 'Z' in timestamp):
-                    # ISO format with timezone info
-                    dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                    if dt.tzinfo is not None:
-                        local_dt = dt.astimezone()
-                    else:
-                        utc_dt = dt.replace(tzinfo=timezone.utc)
-                        local_dt = utc_dt.astimezone()
-                elif 'T' in timestamp:
-                    # ISO format without timezone - assume it's already local time
-                    dt = datetime.fromisoformat(timestamp)
-                    local_dt = dt  # Already local time
-                else:
-                    # Simple format like "2025-09-19 13:03:00" - assume it's already local time
-                    dt = datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S')
-                    local_dt = dt  # Already local time
-                
-                time_str = local_dt.strftime('%H:%M:%S')
-            except Exception as e:
-                print(f"Debug: Error parsing timestamp '{timestamp}': {e}")
-                time_str = datetime.now().strftime('%H:%M:%S')
+            # Format timestamp for display; alarms without one use the clock kept by the time timer
+            if timestamp is None:
+                timestamp = full_str = self._current_time_full
+                time_str = self._current_time_hms
+            else:
+                try:
+                    full_str = _local_timestamp(timestamp)
+                except Exception as e:
+                    print(f"Debug: Error parsing timestamp '{timestamp}': {e}")
+                    full_str = self._current_time_full
+                time_str = full_str[11:]
+            
+            self.alarms_model.prepend(("", full_str, message))
+            
+            self._alarm_count += 1
+            self._refresh_stats_label()
             
             clean_message = self._clean_alarm_message(message)
             
+            # Queued for the recent alarms panel; a burst of alarms is drawn in one pass
             if "Manual override expired" in message:
-                alarm_text = f"[{time_str}] TIMEOUT: {clean_message}"
-                self.recent_alarms_text.setTextColor(QColor("#e74c3c"))
-                self.recent_alarms_text.append(alarm_text)
-                self.recent_alarms_text.setTextColor(QColor("#2c3e50"))
+                self._pending_alarm_lines.append((f"[{time_str}] TIMEOUT: {clean_message}", True))
             else:
-                alarm_text = f"[{time_str}] {clean_message}"
-                self.recent_alarms_text.append(alarm_text)
-            
-            # Keep only last 10 alarms in recent display
-            content = self.recent_alarms_text.toPlainText()
-            lines = content.split('\n')
-            if len(lines) > 10:
-                self.recent_alarms_text.clear()
-                self.recent_alarms_text.append('\n'.join(lines[-10:]))
+                self._pending_alarm_lines.append((f"[{time_str}] {clean_message}", False))
+            if not self._flush_scheduled:
+                self._flush_scheduled = True
+                QTimer.singleShot(0, self._flush_alarms)
             
             # Store in alarm messages list
             self.alarm_messages.append({
@@ -676,19 +1067,47 @@ class ServerRoomMonitorGUI(QMainWindow):
         except Exception as e:
             print(f"Error adding alarm message: {e}")
     
+    def _flush_alarms(self):
+        """Append the queued alarm lines to the recent alarms panel with a single repaint."""
+        self._flush_scheduled = False
+        self.recent_alarms_text.setUpdatesEnabled(False)
+        try:
+            while self._pending_alarm_lines:
+                alarm_text, is_timeout = self._pending_alarm_lines.popleft()
+                
+                # A full panel rolls: the oldest line is dropped once the new one is appended
+                rolled = len(self._recent_alarms) == self._recent_alarms.maxlen
+                
+                if is_timeout:
+                    self.recent_alarms_text.setTextColor(_COLOR_ALARM)
+                    self.recent_alarms_text.append(alarm_text)
+                    self.recent_alarms_text.setTextColor(_COLOR_TEXT)
+                else:
+                    self.recent_alarms_text.append(alarm_text)
+                self._recent_alarms.append(alarm_text)
+                
+                # Keep only the last RECENT_ALARM_LINES alarms, removing the first line in place
+                # rather than reading the whole document back (which also kept the TIMEOUT colors)
+                if rolled:
+                    cursor = QTextCursor(self.recent_alarms_text.document())
+                    cursor.movePosition(QTextCursor.NextBlock, QTextCursor.KeepAnchor)
+                    cursor.removeSelectedText()
+        except Exception as e:
+            print(f"Error updating recent alarms: {e}")
+        finally:
+            self.recent_alarms_text.setUpdatesEnabled(True)
+    
     def _clean_alarm_message(self, message):
         """Clean up alarm message for better display in GUI."""
         try:
-            clean_msg = message.replace('🚨', '').replace('⚠️', '').replace('🔄', '')
-            clean_msg = clean_msg.replace('📤', '').replace('🔒', '').replace('⚡', '')
-            clean_msg = clean_msg.replace('🌡️', 'Temp').replace('💧', 'Humidity')
-            clean_msg = clean_msg.replace('°C', 'C').replace('%', 'pct')
+            clean_msg = message.translate(_EMOJI_STRIP)
+            clean_msg = _WORD_RE.sub(lambda m: _WORD_SUBS[m.group(0)], clean_msg)
             
             clean_msg = ' '.join(clean_msg.split())
             if "Manual button toggle" in clean_msg:
-                parts = clean_msg.split(' - ')
-                if len(parts) >= 2:
-                    clean_msg = f"Manual: {parts[0].split(':')[1].strip()}"
+                toggle = _MANUAL_TOGGLE_RE.search(clean_msg)
+                if toggle:
+                    clean_msg = f"Manual: {toggle.group(1).strip()}"
             elif "Manual override expired" in clean_msg:
                 clean_msg = "Manual override expired - Auto control resumed"
             elif "Cooling fan turned" in clean_msg:
@@ -712,160 +1131,79 @@ class ServerRoomMonitorGUI(QMainWindow):
     
     def update_time_display(self):
         """Update the current time display."""
-        current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        self.time_label.setText(f"🕐 {current_time}")
+        # Also cached for the MQTT handlers, which stamp live rows with it instead of reading the clock
+        now = datetime.now()
+        self._current_time_full = now.strftime('%Y-%m-%d %H:%M:%S')
+        self._current_time_hms = self._current_time_full[11:]
+        self.time_label.setText(f"🕐 {self._current_time_full}")
     
     def update_database_stats(self):
-        """Update database statistics."""
-        try:
-            with sqlite3.connect(DATABASE_FILE) as conn:
-                cursor = conn.cursor()
-                
-                # Get sensor data count
-                cursor.execute("SELECT COUNT(*) FROM sensor_data")
-                sensor_count = cursor.fetchone()[0]
-                
-                # Get alarm count
-                cursor.execute("SELECT COUNT(*) FROM alarms")
-                alarm_count = cursor.fetchone()[0]
-                
-                self.db_stats_label.setText(f"📊 {sensor_count} readings\n🚨 {alarm_count} alarms")
-                
-        except Exception as e:
-            self.db_stats_label.setText("📊 Database Error")
-            print(f"Error updating database stats: {e}")
+        """Ask the database worker to re-count rows; the reply updates the statistics display."""
+        self.counts_requested.emit()
+    
+    def show_database_stats(self, sensor_count, alarm_count):
+        """Update the statistics display with row counts from the database worker."""
+        self._sensor_count = sensor_count
+        self._alarm_count = alarm_count
+        self._refresh_stats_label()
+    
+    def show_database_error(self):
+        """Show that the database worker could not count rows."""
+        self.db_stats_label.setText("📊 Database Error")
+    
+    def _refresh_stats_label(self):
+        """Show the in-memory row counts in the statistics display."""
+        self.db_stats_label.setText(f"📊 {self._sensor_count} readings\n🚨 {self._alarm_count} alarms")
     
     def load_historical_data(self):
-        """Load historical sensor data from database."""
+        """Ask the database worker for historical sensor data; the reply fills the table."""
+        self.history_requested.emit()
+    
+    def show_historical_data(self, data):
+        """Fill the history table with rows from the database worker."""
         try:
-            with sqlite3.connect(DATABASE_FILE) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT id, timestamp, temperature, humidity 
-                    FROM sensor_data 
-                    ORDER BY timestamp DESC 
-                    LIMIT 100
-                ''')
-                
-                data = cursor.fetchall()
-                
-                self.history_table.setRowCount(len(data))
-                
-                for row_idx, row_data in enumerate(data):
-                    for col_idx, cell_data in enumerate(row_data):
-                        if col_idx == 1:  # Timestamp column - convert to local time
-                            try:
-                                # Handle different timestamp formats
-                                if 'T' in cell_data and ('+' in cell_data or 'Z' in cell_data):
-                                    # ISO format with timezone info
-                                    dt = datetime.fromisoformat(cell_data.replace('Z', '+00:00'))
-                                    if dt.tzinfo is not None:
-                                        local_dt = dt.astimezone()
-                                    else:
-                                        utc_dt = dt.replace(tzinfo=timezone.utc)
-                                        local_dt = utc_dt.astimezone()
-                                elif 'T' in cell_data:
-                                    # ISO format without timezone - assume it's already local time
-                                    dt = datetime.fromisoformat(cell_data)
-                                    local_dt = dt  # Already local time
-                                else:
-                                    # Simple format - assume it's already local time
-                                    dt = datetime.strptime(cell_data, '%Y-%m-%d %H:%M:%S')
-                                    local_dt = dt  # Already local time
-                                
-                                cell_data = local_dt.strftime('%Y-%m-%d %H:%M:%S')
-                            except:
-                                # Fallback: keep original timestamp
-                                pass
-                        elif col_idx == 2 or col_idx == 3:  # Temperature and humidity columns
-                            cell_data = f"{float(cell_data):.1f}"
-                        
-                        item = QTableWidgetItem(str(cell_data))
-                        self.history_table.setItem(row_idx, col_idx, item)
-                
-                # Resize columns to content
-                self.history_table.resizeColumnsToContents()
-                
+            # Timestamps are converted to local time; readings are REAL columns, formatted directly.
+            # A generator, so rows are only formatted when the model fetches them
+            rows = (
+                (str(row_id), _table_timestamp(timestamp), f"{temperature:.1f}", f"{humidity:.1f}")
+                for row_id, timestamp, temperature, humidity in data
+            )
+            
+            self.history_model.set_rows(rows)
+            
+            # Resize columns to content
+            self.history_table.resizeColumnsToContents()
+            
         except Exception as e:
-            print(f"Error loading historical data: {e}")
+            print(f"Error showing historical data: {e}")
     
     def load_alarms_data(self):
-        """Load alarms data from database."""
+        """Ask the database worker for alarms data; the reply fills the table."""
+        self.alarms_requested.emit()
+    
+    def show_alarms_data(self, data):
+        """Fill the alarms table with rows from the database worker."""
         try:
-            with sqlite3.connect(DATABASE_FILE) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT id, timestamp, message 
-                    FROM alarms 
-                    ORDER BY timestamp DESC 
-                    LIMIT 50
-                ''')
-                
-                data = cursor.fetchall()
-                
-                self.alarms_table.setRowCount(len(data))
-                
-                for row_idx, row_data in enumerate(data):
-                    for col_idx, cell_data in enumerate(row_data):
-                        if col_idx == 1:  # Timestamp column - convert to local time
-                            try:
-                                # Handle different timestamp formats
-                                if 'T' in cell_data and ('+' in cell_data or 'Z' in cell_data):
-                                    # ISO format with timezone info
-                                    dt = datetime.fromisoformat(cell_data.replace('Z', '+00:00'))
-                                    if dt.tzinfo is not None:
-                                        local_dt = dt.astimezone()
-                                    else:
-                                        utc_dt = dt.replace(tzinfo=timezone.utc)
-                                        local_dt = utc_dt.astimezone()
-                                elif 'T' in cell_data:
-                                    # ISO format without timezone - assume it's already local time
-                                    dt = datetime.fromisoformat(cell_data)
-                                    local_dt = dt  # Already local time
-                                else:
-                                    # Simple format - assume it's already local time
-                                    dt = datetime.strptime(cell_data, '%Y-%m-%d %H:%M:%S')
-                                    local_dt = dt  # Already local time
-                                
-                                cell_data = local_dt.strftime('%Y-%m-%d %H:%M:%S')
-                            except:
-                                # Fallback: keep original timestamp
-                                pass
-                        
-                        item = QTableWidgetItem(str(cell_data))
-                        self.alarms_table.setItem(row_idx, col_idx, item)
-                
-                # Resize columns to content
-                self.alarms_table.resizeColumnsToContents()
-                
+            rows = (
+                (str(row_id), _table_timestamp(timestamp), message)
+                for row_id, timestamp, message in data
+            )
+            
+            self.alarms_model.set_rows(rows)
+            
+            # Resize columns to content
+            self.alarms_table.resizeColumnsToContents()
+            
         except Exception as e:
-            print(f"Error loading alarms data: {e}")
+            print(f"Error showing alarms data: {e}")
     
     def clear_alarm_display(self):
         """Clear the alarm display."""
         self.recent_alarms_text.clear()
+        self._recent_alarms.clear()
+        self._pending_alarm_lines.clear()
         self.alarm_messages.clear()
     
-    def get_temperature_color(self, temp):
-        """Get color for temperature based on value."""
-        if temp < 22:
-            return "#3498db"  # Blue (cool)
-        elif temp < 26:
-            return "#27ae60"  # Green (normal)
-        elif temp < 30:
-            return "#f39c12"  # Orange (warm)
-        else:
-            return "#e74c3c"  # Red (hot)
-    
-    def get_humidity_color(self, humidity):
-        """Get color for humidity based on value."""
-        if humidity < 40:
-            return "#e67e22"  # Orange (low)
-        elif humidity < 70:
-            return "#27ae60"  # Green (normal)
-        else:
-            return "#3498db"  # Blue (high)
-    
     def closeEvent(self, event):
         """Handle application close event."""
         try:
@@ -873,6 +1211,10 @@ class ServerRoomMonitorGUI(QMainWindow):
             self.mqtt_worker.disconnect_from_broker()
             self.mqtt_thread.quit()
             self.mqtt_thread.wait()
+            
+            # Stop database worker; its connection is closed as the thread finishes
+            self.db_thread.quit()
+            self.db_thread.wait()
         except Exception as e:
             print(f"Error during cleanup: {e}")
         